@@ -0,0 +1,132 @@
+# Edgemindstudio/media.py
+
+"""
+Media file serving (replaces django.conf.urls.static.static for MEDIA_URL).
+
+With settings.MEDIA_OFFLOAD set, Django only checks the path and hands the
+transfer to the front proxy:
+    'x-accel-redirect'  nginx; MEDIA_OFFLOAD_PREFIX must map to MEDIA_ROOT
+                        through an `internal` location.
+    'x-sendfile'        Apache mod_xsendfile / lighttpd.
+Otherwise files go out through FileResponse (so the WSGI server can use
+sendfile) with strong ETags, conditional 304s and single byte-range requests.
+
+Content-hashed file names (see api.models.profile_picture_path) are cached as
+immutable; everything else revalidates after MEDIA_CACHE_MAX_AGE seconds.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+HASHED_NAME = re.compile(r'(^|[/_.-])[0-9a-f]{16,}\.[A-Za-z0-9]+$')
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _cache_control(path):
+    if HASHED_NAME.search(path):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+
+
+def _parse_range(header, size):
+    """Return (start, end) inclusive for a single satisfiable range, None to ignore it, or False if unsatisfiable."""
+    match = RANGE_HEADER.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def _read_range(f, start, length):
+    with f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Media file not found")
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404("Media file not found")
+    if not os.path.isfile(fullpath):
+        raise Http404("Media file not found")
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': _cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        for name, value in headers.items():
+            not_modified[name] = value
+        return not_modified
+
+    offload = getattr(settings, 'MEDIA_OFFLOAD', None)
+    if offload:
+        response = HttpResponse(content_type=content_type)
+        if offload == 'x-accel-redirect':
+            prefix = getattr(settings, 'MEDIA_OFFLOAD_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = quote(prefix.rstrip('/') + '/' + path.lstrip('/'))
+        else:
+            response['X-Sendfile'] = fullpath
+    else:
+        byte_range = None
+        if 'HTTP_RANGE' in request.META and request.headers.get('If-Range', etag) == etag:
+            byte_range = _parse_range(request.META['HTTP_RANGE'], stat.st_size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _read_range(open(fullpath, 'rb'), start, length), status=206, content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(length)
+        else:
+            response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -89,6 +90,20 @@ DATABASES = {
     }
 }
 
+# Shared cache: idempotency keys (api/idempotency.py) must be visible to every
+# worker process. Deploys set REDIS_URL (e.g. redis://cache:6379/0, needs the
+# `redis` package); without it Django's per-process LocMemCache is used, which
+# is fine for development and tests but not for more than one worker.
+# `manage.py check --deploy` warns when that is the case.
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
 
 
 # Password validation
@@ -150,3 +165,23 @@ AUTH_USER_MODEL = 'api.User'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Media serving (see Edgemindstudio/media.py). Set MEDIA_OFFLOAD to
+# 'x-accel-redirect' (nginx) or 'x-sendfile' to let the proxy send the bytes.
+MEDIA_OFFLOAD = None
+MEDIA_OFFLOAD_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60
+
+# Forum reply streaming (SSE, served under ASGI). See api/streams.py.
+FORUM_STREAM_BROKER = 'api.streams.PollingBroker'
+FORUM_STREAM_POLL_INTERVAL = 1.0
+FORUM_STREAM_RESCAN_WINDOW = 10.0  # seconds; longest expected reply-insert transaction
+
+# Course recommendations. See api/recommendations.py.
+RECOMMENDATION_RESCAN_WINDOW = 5 * 60  # seconds; longest expected enrollment transaction
+
+# GitHub metadata cache for AI projects. See api/github.py.
+GITHUB_METADATA_CLIENT = 'api.github.GitHubClient'
+GITHUB_TOKEN = None
+GITHUB_METADATA_TTL = 6 * 60 * 60
+GITHUB_METADATA_RETRY = 30 * 60
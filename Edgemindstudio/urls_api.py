@@ -0,0 +1,16 @@
+# Edgemindstudio/urls_api.py
+
+"""
+URL configuration for API-only workers (see settings_api.py).
+"""
+
+from django.urls import path, include, re_path
+
+from django.conf import settings
+
+from .media import serve_media
+
+urlpatterns = [
+    path('api/', include('api.urls')),
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media),
+]
@@ -0,0 +1,31 @@
+# Edgemindstudio/warmup.py
+
+"""
+Warm-up hook run by wsgi.py/asgi.py before a worker accepts traffic.
+
+With a preloading server (gunicorn --preload) this runs once in the master
+and the warmed state is shared by every forked worker.
+"""
+
+import inspect
+
+from django.apps import apps
+from django.urls import get_resolver
+from rest_framework.serializers import Serializer
+
+
+def warm_up():
+    # Import every view and compile every URL pattern regex.
+    resolver = get_resolver()
+    resolver.reverse_dict  # noqa: B018  (populates the resolver caches)
+
+    # Build model field caches.
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+    # Build every serializer's fields once so related model metadata and
+    # field mappings are resolved up front instead of on the first request.
+    from api import serializers
+    for _, cls in inspect.getmembers(serializers, inspect.isclass):
+        if issubclass(cls, Serializer) and cls.__module__ == serializers.__name__:
+            cls().fields
@@ -0,0 +1,116 @@
+# api/accounts.py
+
+from django.db import transaction
+from django.db.models import DateTimeField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from .models import User, Subscription
+
+BULK_CHUNK_SIZE = 1000
+
+
+def _chunks(ids, size):
+    ids = sorted(set(ids))
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _report(requested, found, changed):
+    return {
+        'requested': len(requested),
+        'changed': changed,
+        'unchanged': len(found) - len(changed),
+        'missing': sorted(set(requested) - set(found)),
+    }
+
+
+def bulk_set_role(user_ids, role, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Set `role` on many users with one UPDATE per chunk (no per-row saves or
+    signals). Returns a report of which users changed.
+    """
+    found, changed = [], []
+    now = timezone.now()
+    for chunk in _chunks(user_ids, chunk_size):
+        with transaction.atomic():
+            rows = list(User.objects.filter(pk__in=chunk).values_list('pk', 'role'))
+            to_change = [pk for pk, current in rows if current != role]
+            User.objects.filter(pk__in=to_change).update(role=role, updated_at=now)
+        found += [pk for pk, _ in rows]
+        changed += to_change
+    return _report(set(user_ids), found, changed)
+
+
+def bulk_set_subscription_status(user_ids, status, chunk_size=BULK_CHUNK_SIZE):
+    """Move the subscriptions of many users to `status`, one UPDATE per chunk."""
+    found, changed = [], []
+    now = timezone.now()
+    for chunk in _chunks(user_ids, chunk_size):
+        with transaction.atomic():
+            rows = list(Subscription.objects.filter(user_id__in=chunk).values_list('user_id', 'status'))
+            to_change = [pk for pk, current in rows if current != status]
+            Subscription.objects.filter(user_id__in=to_change).update(status=status)
+            apply_subscription_status(to_change, status, now)
+        found += [pk for pk, _ in rows]
+        changed += to_change
+    return _report(set(user_ids), found, changed)
+
+
+def apply_subscription_status(user_ids, status, now=None):
+    """
+    Update users whose subscription just moved to `status`.
+
+    The single place for the side effects of a status change, used by the
+    bulk action, the expiry sweep and the Subscription post_save receiver:
+    'active' sets premium_until to the subscription's end_date; 'expired'
+    downgrades premium users to free and ends premium_until at the earlier
+    of end_date and `now`.
+    """
+    now = now or timezone.now()
+    end_date = Subquery(Subscription.objects.filter(user=OuterRef('pk')).values('end_date')[:1])
+    users = User.objects.filter(pk__in=user_ids)
+    if status == 'expired':
+        now_value = Value(now, output_field=DateTimeField())
+        users.update(premium_until=Least(Coalesce(end_date, now_value), now_value))
+        users.filter(role='premium').update(role='free', updated_at=now)
+    else:
+        users.update(premium_until=end_date)
+
+
+def expire_due_subscriptions(now=None, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Expire active subscriptions whose end_date has passed and downgrade their
+    premium users to free.
+
+    Walks the (status, end_date) index in keyset order, one transaction per
+    chunk; each chunk is locked and re-checked before it is updated, so only
+    users whose subscription actually expired are downgraded. Returns the
+    number of subscriptions expired.
+    """
+    now = now or timezone.now()
+    due = Subscription.objects.filter(status='active', end_date__lte=now).order_by('end_date', 'id')
+    expired = 0
+    last = None
+    while True:
+        page = due
+        if last is not None:
+            page = page.filter(Q(end_date__gt=last[0]) | Q(end_date=last[0], id__gt=last[1]))
+        rows = list(page.values_list('id', 'user_id', 'end_date')[:chunk_size])
+        if not rows:
+            break
+
+        ids = [pk for pk, _, _ in rows]
+        with transaction.atomic():
+            # Re-check under row locks: a renewal may have moved end_date or
+            # reactivated the subscription since the page was read.
+            still_due = list(
+                Subscription.objects.select_for_update()
+                .filter(pk__in=ids, status='active', end_date__lte=now)
+                .values_list('id', 'user_id')
+            )
+            if still_due:
+                expired += Subscription.objects.filter(pk__in=[pk for pk, _ in still_due]).update(status='expired')
+                apply_subscription_status([user_id for _, user_id in still_due], 'expired', now)
+        last = (rows[-1][2], rows[-1][0])
+    return expired
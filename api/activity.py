@@ -0,0 +1,95 @@
+# api/activity.py
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Lesson, LessonEvent, UserCourseProgress
+from . import analytics, content
+
+# UserCourseProgress.last_accessed is only bumped when it is older than this,
+# so a stream of heartbeats doesn't rewrite the progress row every few seconds.
+LAST_ACCESSED_RESOLUTION = timedelta(minutes=15)
+
+
+def complete_lesson(user, lesson, record_event=True):
+    """
+    Mark `lesson` complete for `user` and recompute course progress.
+
+    Returns the progress row. Nothing is written when the lesson was already
+    complete, so retries and duplicate 'complete' events are free. A
+    'complete' LessonEvent is logged unless the caller already stored one.
+    """
+    progress, _ = UserCourseProgress.objects.get_or_create(user=user, course_id=lesson.course_id)
+    if progress.completed_lessons.filter(pk=lesson.pk).exists():
+        return progress
+
+    now = timezone.now()
+    progress.completed_lessons.add(lesson)
+    analytics.record_lesson_completion(lesson)
+    if record_event:
+        LessonEvent.objects.create(
+            user=user, course_id=lesson.course_id, lesson=lesson, event_type='complete', occurred_at=now
+        )
+
+    total_lessons = Lesson.objects.filter(course_id=lesson.course_id).count()
+    completed = progress.completed_lessons.count()
+    progress.progress_percentage = round((completed / total_lessons) * 100, 2)
+    progress.completed = (progress.progress_percentage == 100.0)
+    if progress.completed and progress.completed_at is None:
+        progress.completed_at = now
+    progress.save(update_fields=['progress_percentage', 'completed', 'completed_at', 'last_accessed'])
+    return progress
+
+
+def touch_progress(user, course_ids, now=None):
+    """Bump last_accessed for the given courses, skipping rows touched recently."""
+    now = now or timezone.now()
+    return UserCourseProgress.objects.filter(
+        user=user,
+        course_id__in=course_ids,
+        last_accessed__lt=now - LAST_ACCESSED_RESOLUTION,
+    ).update(last_accessed=now)
+
+
+def ingest_events(user, events):
+    """
+    Store a batch of validated client events (see LessonEventSerializer).
+
+    Lessons are resolved in one query, events for lessons the user cannot
+    view are dropped, the batch is written with a single bulk_create, and
+    progress rows are only written for new completions or a stale
+    last_accessed. Every event is stamped with the server time; the client's
+    timestamp is kept in client_time only. Returns the number of events stored.
+    """
+    lesson_ids = {e['lesson'] for e in events}
+    lessons = Lesson.objects.only('id', 'course_id').in_bulk(lesson_ids)
+    allowed = content.viewable_course_ids(user, {lesson.course_id for lesson in lessons.values()})
+
+    now = timezone.now()
+    rows = []
+    completed = []
+    for e in events:
+        lesson = lessons.get(e['lesson'])
+        if lesson is None or lesson.course_id not in allowed:
+            continue
+        rows.append(LessonEvent(
+            user=user,
+            course_id=lesson.course_id,
+            lesson=lesson,
+            event_type=e['type'],
+            position=e.get('position'),
+            duration=e.get('duration', 0),
+            occurred_at=now,
+            client_time=e.get('timestamp'),
+        ))
+        if e['type'] == 'complete' and lesson not in completed:
+            completed.append(lesson)
+
+    with transaction.atomic():
+        LessonEvent.objects.bulk_create(rows, batch_size=500)
+        for lesson in completed:
+            complete_lesson(user, lesson, record_event=False)
+        touch_progress(user, {row.course_id for row in rows})
+    return len(rows)
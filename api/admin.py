@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import User
+from .accounts import bulk_set_role
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -9,3 +10,16 @@ class CustomUserAdmin(UserAdmin):
     fieldsets = UserAdmin.fieldsets + (
         (None, {'fields': ('role',)}),
     )
+    actions = ['make_premium', 'make_free']
+
+    def _set_role(self, request, queryset, role):
+        report = bulk_set_role(queryset.values_list('pk', flat=True), role)
+        self.message_user(request, f"{len(report['changed'])} user(s) changed to {role}, {report['unchanged']} already were.")
+
+    @admin.action(description="Upgrade selected users to premium")
+    def make_premium(self, request, queryset):
+        self._set_role(request, queryset, 'premium')
+
+    @admin.action(description="Downgrade selected users to free")
+    def make_free(self, request, queryset):
+        self._set_role(request, queryset, 'free')
@@ -0,0 +1,254 @@
+# api/analytics.py
+
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import (
+    Enrollment, LessonEvent, UserCourseProgress, CourseDailyStats, LessonDailyStats
+)
+
+CompletedLesson = UserCourseProgress.completed_lessons.through
+
+# Best date for a CompletedLesson row that predates the LessonEvent log
+LEGACY_COMPLETED_AT = Coalesce('usercourseprogress__completed_at', 'usercourseprogress__last_accessed')
+
+
+# ---------- COURSE ROLLUPS ----------
+def rollup_course_days(start, end):
+    """
+    Recompute CourseDailyStats for every day in [start, end] (inclusive dates).
+
+    Runs three GROUP BY queries over the range and upserts the results, so it
+    is safe to re-run for the same days. Every count is keyed on a timestamp
+    that never moves: enrolled_at, completed_at, and LessonEvent.occurred_at
+    for active users.
+    """
+    rows = {}
+
+    def bucket(course_id, day):
+        key = (course_id, day)
+        if key not in rows:
+            rows[key] = CourseDailyStats(course_id=course_id, date=day)
+        return rows[key]
+
+    enrollments = (
+        Enrollment.objects
+        .filter(enrolled_at__date__gte=start, enrolled_at__date__lte=end)
+        .annotate(day=TruncDate('enrolled_at'))
+        .values('course_id', 'day')
+        .annotate(n=Count('id'))
+    )
+    for row in enrollments:
+        bucket(row['course_id'], row['day']).enrollments = row['n']
+
+    active = (
+        LessonEvent.objects
+        .filter(occurred_at__date__gte=start, occurred_at__date__lte=end)
+        .annotate(day=TruncDate('occurred_at'))
+        .values('course_id', 'day')
+        .annotate(n=Count('user_id', distinct=True))
+    )
+    for row in active:
+        bucket(row['course_id'], row['day']).active_users = row['n']
+
+    completions = (
+        UserCourseProgress.objects
+        .filter(completed_at__date__gte=start, completed_at__date__lte=end)
+        .annotate(day=TruncDate('completed_at'))
+        .values('course_id', 'day')
+        .annotate(n=Count('id'))
+    )
+    for row in completions:
+        bucket(row['course_id'], row['day']).completions = row['n']
+
+    with transaction.atomic():
+        # Days that no longer have any activity must not keep stale numbers.
+        CourseDailyStats.objects.filter(date__gte=start, date__lte=end).update(
+            enrollments=0, completions=0, active_users=0
+        )
+        CourseDailyStats.objects.bulk_create(
+            rows.values(),
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['course', 'date'],
+            update_fields=['enrollments', 'completions', 'active_users'],
+        )
+    return len(rows)
+
+
+def rollup_recent():
+    """
+    Incremental run for the periodic job: recompute from the day before the
+    last rolled-up date (late writes land there) through today.
+    """
+    today = timezone.localdate()
+    last = CourseDailyStats.objects.aggregate(last=Max('date'))['last']
+    start = min(last - timedelta(days=1), today) if last else today
+    return rollup_course_days(start, today)
+
+
+def backfill_course_days(chunk_days=30, stdout=None):
+    """Roll up the whole history, `chunk_days` days per transaction."""
+    first = Enrollment.objects.aggregate(first=Min('enrolled_at'))['first']
+    if first is None:
+        return 0
+
+    start = timezone.localdate(first)
+    today = timezone.localdate()
+    total = 0
+    while start <= today:
+        end = min(start + timedelta(days=chunk_days - 1), today)
+        total += rollup_course_days(start, end)
+        if stdout:
+            stdout.write(f"Rolled up {start} .. {end}")
+        start = end + timedelta(days=1)
+    return total
+
+
+# ---------- LESSON ROLLUPS ----------
+def record_lesson_completion(lesson):
+    """Count a new lesson completion in today's LessonDailyStats row."""
+    stats, _ = LessonDailyStats.objects.get_or_create(
+        lesson=lesson, date=timezone.localdate(), defaults={'course_id': lesson.course_id}
+    )
+    LessonDailyStats.objects.filter(pk=stats.pk).update(completions=F('completions') + 1)
+
+
+def _lesson_completions(start, end):
+    """
+    {(lesson_id, course_id, day): learners} for first completions in
+    [start, end]. A completion is dated by the learner's earliest 'complete'
+    LessonEvent for the lesson; completions from before the event log fall
+    back to the progress row's completed_at, then last_accessed.
+    """
+    complete = LessonEvent.objects.filter(event_type='complete')
+    earlier = complete.filter(
+        user=OuterRef('user'), lesson=OuterRef('lesson'), occurred_at__lt=OuterRef('occurred_at')
+    )
+    logged = (
+        complete
+        .filter(occurred_at__date__gte=start, occurred_at__date__lte=end)
+        .filter(~Exists(earlier))
+        .annotate(day=TruncDate('occurred_at'))
+        .values('lesson_id', 'course_id', 'day')
+        .annotate(n=Count('user_id', distinct=True))
+    )
+    counts = Counter()
+    for row in logged:
+        counts[(row['lesson_id'], row['course_id'], row['day'])] += row['n']
+
+    has_event = complete.filter(user=OuterRef('usercourseprogress__user'), lesson=OuterRef('lesson'))
+    legacy = (
+        CompletedLesson.objects
+        .filter(~Exists(has_event))
+        .annotate(at=LEGACY_COMPLETED_AT)
+        .filter(at__date__gte=start, at__date__lte=end)
+        .annotate(day=TruncDate('at'))
+        .values('lesson_id', 'lesson__course_id', 'day')
+        .annotate(n=Count('id'))
+    )
+    for row in legacy:
+        counts[(row['lesson_id'], row['lesson__course_id'], row['day'])] += row['n']
+    return counts
+
+
+def rollup_lesson_days(start, end):
+    """Recompute LessonDailyStats for [start, end] (inclusive dates); safe to re-run."""
+    counts = _lesson_completions(start, end)
+    with transaction.atomic():
+        LessonDailyStats.objects.filter(date__gte=start, date__lte=end).update(completions=0)
+        LessonDailyStats.objects.bulk_create(
+            [
+                LessonDailyStats(lesson_id=lesson_id, course_id=course_id, date=day, completions=n)
+                for (lesson_id, course_id, day), n in counts.items()
+            ],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['lesson', 'date'],
+            update_fields=['completions'],
+        )
+    return len(counts)
+
+
+def backfill_lesson_stats(chunk_days=30, stdout=None):
+    """Roll up lesson completions over the whole history, `chunk_days` days per transaction."""
+    firsts = [
+        LessonEvent.objects.filter(event_type='complete').aggregate(first=Min('occurred_at'))['first'],
+        CompletedLesson.objects.aggregate(first=Min(LEGACY_COMPLETED_AT))['first'],
+    ]
+    firsts = [first for first in firsts if first is not None]
+    if not firsts:
+        return 0
+
+    start = timezone.localdate(min(firsts))
+    today = timezone.localdate()
+    total = 0
+    while start <= today:
+        end = min(start + timedelta(days=chunk_days - 1), today)
+        total += rollup_lesson_days(start, end)
+        if stdout:
+            stdout.write(f"Rolled up lessons {start} .. {end}")
+        start = end + timedelta(days=1)
+    return total
+
+
+# ---------- REPORTS ----------
+def course_report(course, start, end):
+    days = list(
+        CourseDailyStats.objects
+        .filter(course=course, date__gte=start, date__lte=end)
+        .order_by('date')
+        .values('date', 'enrollments', 'completions', 'active_users')
+    )
+    return {
+        'course': course.id,
+        'start': start,
+        'end': end,
+        'totals': {
+            'enrollments': sum(d['enrollments'] for d in days),
+            'completions': sum(d['completions'] for d in days),
+        },
+        'days': days,
+    }
+
+
+def course_funnel(course):
+    """Learners who completed each lesson (in lesson order) and the drop-off between lessons."""
+    reached = dict(
+        LessonDailyStats.objects
+        .filter(course=course)
+        .values_list('lesson_id')
+        .annotate(n=Sum('completions'))
+    )
+    funnel = []
+    previous = None
+    for lesson_id, title, order in course.lessons.order_by('order').values_list('id', 'title', 'order'):
+        learners = reached.get(lesson_id, 0)
+        funnel.append({
+            'lesson': lesson_id,
+            'title': title,
+            'order': order,
+            'learners': learners,
+            'drop_off': 0 if previous is None else max(previous - learners, 0),
+        })
+        previous = learners
+    return funnel
+
+
+def overview_report(start, end):
+    return list(
+        CourseDailyStats.objects
+        .filter(date__gte=start, date__lte=end)
+        .values('course_id', 'course__title')
+        .annotate(
+            enrollments=Sum('enrollments'),
+            completions=Sum('completions'),
+            peak_active_users=Max('active_users'),
+        )
+        .order_by('-enrollments')
+    )
@@ -0,0 +1,51 @@
+# api/blog.py
+
+from django.db.models import F
+
+from .models import BlogPost, BlogTag
+
+
+# One set of rules for what is stored (BlogPostSerializer), counted (BlogTag)
+# and matched by ?tag= filtering (BlogPostViewSet).
+TAG_MAX_LENGTH = BlogTag._meta.get_field('name').max_length
+
+
+def clean_tags(tags):
+    """Stripped, de-duplicated tag names in their original order; blank and over-long names are dropped."""
+    cleaned = []
+    for tag in tags or []:
+        name = str(tag).strip()
+        if name and len(name) <= TAG_MAX_LENGTH and name not in cleaned:
+            cleaned.append(name)
+    return cleaned
+
+
+def tag_set(tags):
+    return set(clean_tags(tags))
+
+
+def adjust_tag_counts(added=(), removed=()):
+    """Apply a tag diff to BlogTag.post_count with single UPDATEs."""
+    if added:
+        BlogTag.objects.bulk_create([BlogTag(name=t) for t in added], ignore_conflicts=True)
+        BlogTag.objects.filter(name__in=added).update(post_count=F('post_count') + 1)
+    if removed:
+        BlogTag.objects.filter(name__in=removed, post_count__gt=0).update(post_count=F('post_count') - 1)
+
+
+def rebuild_tag_counts():
+    """Recount every tag from scratch, for repairing drift after raw/bulk writes."""
+    counts = {}
+    for tags in BlogPost.objects.values_list('tags', flat=True).iterator(chunk_size=2000):
+        for tag in tag_set(tags):
+            counts[tag] = counts.get(tag, 0) + 1
+
+    BlogTag.objects.exclude(name__in=counts).update(post_count=0)
+    BlogTag.objects.bulk_create(
+        [BlogTag(name=name, post_count=n) for name, n in counts.items()],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=['post_count'],
+    )
+    return len(counts)
@@ -0,0 +1,81 @@
+# api/content.py
+
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Length, Substr
+
+from .models import Enrollment, Lesson, UserCourseProgress
+
+CompletedLesson = UserCourseProgress.completed_lessons.through
+
+# Default and maximum number of characters returned per content page.
+CONTENT_PAGE_SIZE = 32 * 1024
+MAX_CONTENT_PAGE_SIZE = 256 * 1024
+
+
+def can_view_lessons(user, course_id):
+    if not user.is_authenticated:
+        return False
+    if user.role in ['admin', 'staff']:
+        return True
+    return Enrollment.objects.filter(user=user, course_id=course_id).exists()
+
+
+def viewable_course_ids(user, course_ids):
+    """The subset of `course_ids` whose lessons `user` may view, in one query."""
+    course_ids = set(course_ids)
+    if not user.is_authenticated or not course_ids:
+        return set()
+    if user.role in ['admin', 'staff']:
+        return course_ids
+    return set(
+        Enrollment.objects.filter(user=user, course_id__in=course_ids).values_list('course_id', flat=True)
+    )
+
+
+def lesson_outline(course, user):
+    """
+    Lightweight lesson list for course detail: id, title, order and whether
+    `user` completed it. One query, never touching the content column.
+    """
+    completed = CompletedLesson.objects.filter(
+        lesson=OuterRef('pk'),
+        usercourseprogress__user=user,
+        usercourseprogress__course=course,
+    )
+    return list(
+        Lesson.objects
+        .filter(course=course)
+        .order_by('order')
+        .annotate(completed=Exists(completed))
+        .values('id', 'title', 'order', 'completed')
+    )
+
+
+def lesson_content_page(lesson_id, offset=0, limit=CONTENT_PAGE_SIZE):
+    """
+    Return one slice of a lesson's content, cut in the database so the full
+    TextField is never loaded. Returns None if the lesson does not exist.
+    """
+    limit = max(1, min(limit, MAX_CONTENT_PAGE_SIZE))
+    offset = max(0, offset)
+    row = (
+        Lesson.objects
+        .filter(pk=lesson_id)
+        .annotate(length=Length('content'), chunk=Substr('content', offset + 1, limit))
+        .values('id', 'course_id', 'title', 'video_url', 'length', 'chunk')
+        .first()
+    )
+    if row is None:
+        return None
+
+    end = offset + len(row['chunk'])
+    return {
+        'id': row['id'],
+        'course': row['course_id'],
+        'title': row['title'],
+        'video_url': row['video_url'],
+        'length': row['length'],
+        'offset': offset,
+        'content': row['chunk'],
+        'next_offset': end if end < row['length'] else None,
+    }
@@ -0,0 +1,66 @@
+# api/enrollment.py
+
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Course, Enrollment, EnrollmentRemoval
+
+
+class CourseNotFound(Exception):
+    pass
+
+
+def enroll(user, course_id):
+    """
+    Enroll `user` in a course. Returns True if a new enrollment was created,
+    False if it already existed; raises CourseNotFound for unknown courses.
+
+    The insert is a single INSERT ... SELECT ... ON CONFLICT DO NOTHING, so
+    concurrent retries from the same user can never hit the unique
+    constraint, and Course.enrollment_count is only bumped by the request
+    that actually inserted the row.
+    """
+    enrollment_table = Enrollment._meta.db_table
+    course_table = Course._meta.db_table
+    sql = (
+        f'INSERT INTO {enrollment_table} (user_id, course_id, enrolled_at) '
+        f'SELECT %s, id, %s FROM {course_table} WHERE id = %s '
+        f'ON CONFLICT (user_id, course_id) DO NOTHING RETURNING id'
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user.pk, timezone.now(), course_id])
+            created = cursor.fetchone() is not None
+        if created:
+            Course.objects.filter(pk=course_id).update(enrollment_count=F('enrollment_count') + 1)
+
+    if not created and not Course.objects.filter(pk=course_id).exists():
+        raise CourseNotFound(course_id)
+    return created
+
+
+def release(course_id, user_id):
+    """
+    Undo one enrollment (Enrollment post_delete): decrement
+    Course.enrollment_count and log the removal for recommendation runs.
+    """
+    Course.objects.filter(pk=course_id, enrollment_count__gt=0).update(enrollment_count=F('enrollment_count') - 1)
+    EnrollmentRemoval.objects.create(course_id=course_id, user_id=user_id)
+
+
+def recount_enrollments():
+    """
+    Recompute every Course.enrollment_count from Enrollment, for repairing
+    drift after raw SQL deletes or writes that bypass the signals.
+    Returns the number of courses whose count changed.
+    """
+    counts = (
+        Enrollment.objects.filter(course=OuterRef('pk'))
+        .order_by().values('course').annotate(n=Count('id')).values('n')
+    )
+    actual = Coalesce(Subquery(counts), 0)
+    return Course.objects.annotate(actual=actual).exclude(enrollment_count=F('actual')).update(
+        enrollment_count=actual
+    )
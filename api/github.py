@@ -0,0 +1,149 @@
+# api/github.py
+
+"""
+GitHub repository metadata for AIProject cards.
+
+Requests never call GitHub: list responses read GitHubRepoMetadata rows,
+and `refresh_stale` (run by `manage.py refresh_github_metadata`) re-fetches
+missing or expired rows through a bounded thread pool.
+
+The client is pluggable via settings.GITHUB_METADATA_CLIENT; FakeGitHubClient
+serves canned data for tests and local development.
+"""
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from .models import AIProject, GitHubRepoMetadata
+
+REPO_URL = re.compile(r'^https?://(?:www\.)?github\.com/([\w.-]+)/([\w.-]+?)(?:\.git)?/?$')
+
+
+class GitHubError(Exception):
+    pass
+
+
+def repo_name(url):
+    """'https://github.com/owner/name' -> 'owner/name', or None if it isn't a repo URL."""
+    match = REPO_URL.match(url.strip())
+    return f'{match.group(1)}/{match.group(2)}' if match else None
+
+
+# ---------- CLIENTS ----------
+class GitHubClient:
+    api_url = 'https://api.github.com/repos/'
+    timeout = 10
+
+    def __init__(self):
+        self.token = getattr(settings, 'GITHUB_TOKEN', None)
+
+    def fetch(self, repo):
+        """Return {'description', 'stars', 'language', 'pushed_at'} for 'owner/name'."""
+        headers = {'Accept': 'application/vnd.github+json', 'User-Agent': 'edgemindstudio'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        try:
+            with urlopen(Request(self.api_url + repo, headers=headers), timeout=self.timeout) as response:
+                data = json.load(response)
+        except HTTPError as exc:
+            raise GitHubError(f'GitHub returned {exc.code} for {repo}')
+        except (URLError, TimeoutError, ValueError) as exc:
+            raise GitHubError(f'Could not fetch {repo}: {exc}')
+
+        return {
+            'description': data.get('description') or '',
+            'stars': data.get('stargazers_count') or 0,
+            'language': data.get('language') or '',
+            'pushed_at': parse_datetime(data['pushed_at']) if data.get('pushed_at') else None,
+        }
+
+
+class FakeGitHubClient:
+    """Offline client: returns `repos[repo]`, or raises GitHubError for unknown repos."""
+
+    def __init__(self, repos=None):
+        self.repos = dict(repos or {})
+
+    def fetch(self, repo):
+        if repo not in self.repos:
+            raise GitHubError(f'GitHub returned 404 for {repo}')
+        return dict(self.repos[repo])
+
+
+def get_client():
+    return import_string(getattr(settings, 'GITHUB_METADATA_CLIENT', 'api.github.GitHubClient'))()
+
+
+# ---------- REFRESH ----------
+def stale_projects(now=None):
+    now = now or timezone.now()
+    return AIProject.objects.filter(
+        Q(github__isnull=True) | Q(github__expires_at__lte=now)
+    ).select_related('github').order_by(F('github__expires_at').asc(nulls_first=True), 'id')
+
+
+def refresh_stale(limit=100, concurrency=8, client=None):
+    """
+    Re-fetch metadata for up to `limit` missing or expired projects, at most
+    `concurrency` requests in flight. Failures keep the previous values and
+    are retried after GITHUB_METADATA_RETRY. Returns (refreshed, failed).
+    """
+    client = client or get_client()
+    ttl = timedelta(seconds=getattr(settings, 'GITHUB_METADATA_TTL', 6 * 60 * 60))
+    retry = timedelta(seconds=getattr(settings, 'GITHUB_METADATA_RETRY', 30 * 60))
+    projects = list(stale_projects()[:limit])
+
+    def fetch(project):
+        repo = repo_name(project.github_repo_url)
+        if repo is None:
+            return project, repo, None, 'Not a GitHub repository URL'
+        try:
+            return project, repo, client.fetch(repo), ''
+        except GitHubError as exc:
+            return project, repo, None, str(exc)[:255]
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(fetch, projects))
+
+    now = timezone.now()
+    rows = []
+    failed = 0
+    for project, repo, data, error in results:
+        row = getattr(project, 'github', None) or GitHubRepoMetadata(project=project)
+        row.error = error
+        if data is not None:
+            # `repo` labels the metadata, so it only moves with a successful fetch
+            row.repo = repo
+            for field, value in data.items():
+                setattr(row, field, value)
+            row.fetched_at = now
+            row.expires_at = now + ttl
+        else:
+            failed += 1
+            row.expires_at = now + retry
+        rows.append(row)
+
+    GitHubRepoMetadata.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['project'],
+        update_fields=['repo', 'description', 'stars', 'language', 'pushed_at', 'fetched_at', 'expires_at', 'error'],
+    )
+    return len(rows) - failed, failed
+
+
+def expire_if_repo_changed(project):
+    """Make cached metadata stale when the project now points at another repo."""
+    GitHubRepoMetadata.objects.filter(project=project).exclude(
+        repo=repo_name(project.github_repo_url) or ''
+    ).update(expires_at=timezone.now())
@@ -0,0 +1,86 @@
+# api/idempotency.py
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks import Tags, Warning, register
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+IDEMPOTENCY_TTL = 24 * 60 * 60
+
+# Placeholder stored while the first request for a key is running. Expires on
+# its own if the worker dies mid-request, so the key becomes usable again.
+IN_FLIGHT = 'in-flight'
+IN_FLIGHT_TTL = 60
+
+
+def _cache_key(user_id, path, key):
+    # Header values are client-controlled: hash them so any length or
+    # character set makes a valid, fixed-size cache key.
+    digest = hashlib.sha256(f'{path}\n{key}'.encode()).hexdigest()
+    return f'idempotency:{user_id}:{digest}'
+
+
+def idempotent(view):
+    """
+    Replay the first response for a repeated `Idempotency-Key` header.
+
+    Responses are cached per user and key, so a client retrying a POST after
+    a timeout gets the original answer instead of re-running the view. The
+    key is claimed atomically (cache.add) before the view runs; a retry that
+    arrives while the first request is still running gets 409. The request
+    body is fingerprinted with the response, and reusing a key for a
+    different body is rejected with 422. Error responses (5xx) are not cached
+    so they can be retried. Needs a cache shared by all workers (CACHES).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Works for function views and for APIView methods (self, request, ...)
+        request = next(arg for arg in args if isinstance(arg, Request))
+        key = request.headers.get('Idempotency-Key')
+        if not key or not request.user.is_authenticated:
+            return view(*args, **kwargs)
+
+        cache_key = _cache_key(request.user.pk, request.path, key)
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+
+        if not cache.add(cache_key, IN_FLIGHT, IN_FLIGHT_TTL):
+            cached = cache.get(cache_key)
+            if cached is None or cached == IN_FLIGHT:
+                return Response(
+                    {'error': 'A request with this Idempotency-Key is still in progress'},
+                    status=409, headers={'Retry-After': '1'},
+                )
+            body_hash, data, status = cached
+            if body_hash != fingerprint:
+                return Response(
+                    {'error': 'Idempotency-Key was already used with a different request body'}, status=422
+                )
+            return Response(data, status=status, headers={'Idempotent-Replayed': 'true'})
+
+        try:
+            response = view(*args, **kwargs)
+        except BaseException:
+            cache.delete(cache_key)
+            raise
+        if response.status_code < 500:
+            cache.set(cache_key, (fingerprint, response.data, response.status_code), IDEMPOTENCY_TTL)
+        else:
+            cache.delete(cache_key)
+        return response
+    return wrapper
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if backend.endswith(('.LocMemCache', '.DummyCache')):
+        return [Warning(
+            'Idempotency keys are stored in a per-process cache.',
+            hint='Set REDIS_URL (or CACHES) to a cache shared by all workers.',
+            id='api.W001',
+        )]
+    return []
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.revenue import backfill_revenue
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily revenue rollups from the payment ledger in date chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-days', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rows = backfill_revenue(chunk_days=options['chunk_days'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Upserted {rows} revenue-day rows"))
@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from api.recommendations import TOP_K, build_matrix, top_neighbors
+
+
+class Command(BaseCommand):
+    help = "Time the co-enrollment similarity computation on synthetic data (no database access)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enrollments', type=int, default=1_000_000)
+        parser.add_argument('--courses', type=int, default=2_000)
+        parser.add_argument('--users', type=int, default=200_000)
+        parser.add_argument('--top-k', type=int, default=TOP_K)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _timed(self, label, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.stdout.write(f"{label:<36} {(time.perf_counter() - start) * 1000:10.1f} ms")
+        return result
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        # Zipf-ish course popularity so a few courses are large, like real catalogs
+        popularity = 1.0 / np.arange(1, options['courses'] + 1)
+        course_ids = rng.choice(options['courses'], size=options['enrollments'], p=popularity / popularity.sum())
+        user_ids = rng.integers(0, options['users'], size=options['enrollments'])
+
+        matrix, courses = self._timed("build course x user matrix", lambda: build_matrix(course_ids, user_ids))
+        self.stdout.write(f"{'':<36} {len(courses)} courses, {matrix.nnz} distinct enrollments")
+
+        all_rows = np.arange(len(courses))
+        self._timed(f"top-{options['top_k']} for all courses", lambda: top_neighbors(matrix, all_rows, k=options['top_k']))
+
+        changed = rng.choice(len(courses), size=max(1, len(courses) // 100), replace=False)
+        affected = self._timed(
+            "affected set for 1% changed courses",
+            lambda: np.unique((matrix[changed] @ matrix.T).tocoo().col),
+        )
+        self._timed(
+            f"incremental top-k ({len(affected)} courses)",
+            lambda: top_neighbors(matrix, affected, k=options['top_k']),
+        )
@@ -0,0 +1,101 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Payment, User
+from api.revenue import backfill_revenue, cohort_report, revenue_report
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Load synthetic payments, then time the rollup backfill and the revenue "
+        "reports against an ad-hoc SUM. Everything is rolled back unless --keep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000)
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write("Rolled back benchmark data")
+
+    def _timed(self, label, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.stdout.write(f"{label:<40} {(time.perf_counter() - start) * 1000:10.1f} ms")
+        return result
+
+    def _run(self, options):
+        users = self._timed(f"create {options['users']} users", lambda: User.objects.bulk_create(
+            [User(username=f'bench-revenue-{i}', password='!') for i in range(options['users'])],
+            batch_size=10_000,
+        ))
+        user_ids = [u.pk for u in users]
+        self._timed(f"insert {options['rows']} payments", lambda: self._load(user_ids, options['rows'], options['days']))
+
+        end = timezone.localdate()
+        start = end - timedelta(days=29)
+        self._timed("backfill_revenue", backfill_revenue)
+        self._timed("ad-hoc SUM over payments (30 days)", lambda: Payment.objects.filter(
+            status='success', created_at__date__gte=start
+        ).aggregate(Sum('amount')))
+        self._timed("revenue_report by day (30 days)", lambda: revenue_report(start, end))
+        self._timed("revenue_report by method (30 days)", lambda: revenue_report(start, end, group='method'))
+        self._timed("cohort_report (30 days)", lambda: cohort_report(start, end))
+
+    def _load(self, user_ids, rows, days):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {Payment._meta.db_table} (user_id, amount, payment_method, status, created_at)
+                    SELECT (%s::bigint[])[1 + g %% %s],
+                           round((random() * 100)::numeric, 2),
+                           CASE WHEN g %% 3 = 0 THEN 'paypal' ELSE 'stripe' END,
+                           CASE g %% 10 WHEN 0 THEN 'failed' WHEN 1 THEN 'pending' ELSE 'success' END,
+                           now() - random() * (%s * interval '1 day')
+                    FROM generate_series(1, %s) AS g
+                    """,
+                    [user_ids, len(user_ids), days, rows],
+                )
+                cursor.execute(f"ANALYZE {Payment._meta.db_table}")
+            return
+
+        now = timezone.now()
+        batch = []
+        for g in range(rows):
+            batch.append(Payment(
+                user_id=user_ids[g % len(user_ids)],
+                amount=Decimal(random.randint(0, 10_000)) / 100,
+                payment_method='paypal' if g % 3 == 0 else 'stripe',
+                status={0: 'failed', 1: 'pending'}.get(g % 10, 'success'),
+            ))
+            if len(batch) == 10_000:
+                self._insert(batch, now, days)
+                batch = []
+        self._insert(batch, now, days)
+
+    def _insert(self, batch, now, days):
+        # created_at is auto_now_add, so backdate the rows after inserting them
+        created = Payment.objects.bulk_create(batch)
+        for payment in created:
+            payment.created_at = now - timedelta(seconds=random.randint(0, days * 86400))
+        Payment.objects.bulk_update(created, ['created_at'])
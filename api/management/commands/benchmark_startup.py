@@ -0,0 +1,68 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter: boots the WSGI app (including warm-up) and
+# serves one request that needs no database (unauthenticated /api/ -> 401).
+BOOT_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+from Edgemindstudio.wsgi import application
+booted = time.perf_counter()
+from django.test import RequestFactory
+status = []
+environ = RequestFactory().get('/api/', HTTP_HOST='localhost').environ
+body = b''.join(application(environ, lambda s, h, *a: status.append(s)))
+done = time.perf_counter()
+print(json.dumps({'boot': booted - start, 'first_response': done - start, 'status': status[0]}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure worker boot time and time to first response for one or more settings modules."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile', action='append', dest='profiles',
+            help="Settings module to measure (repeatable). Defaults to the full and API-only profiles.",
+        )
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--importtime', action='store_true', help="Also print the slowest imports from -X importtime.")
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or ['Edgemindstudio.settings', 'Edgemindstudio.settings_api']
+        for profile in profiles:
+            env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+            boot, first = [], []
+            for _ in range(options['runs']):
+                result = self._run([sys.executable, '-c', BOOT_SCRIPT], env)
+                stats = json.loads(result.stdout.strip().splitlines()[-1])
+                boot.append(stats['boot'] * 1000)
+                first.append(stats['first_response'] * 1000)
+
+            self.stdout.write(
+                f"{profile}: boot {statistics.median(boot):.1f} ms, "
+                f"first response {statistics.median(first):.1f} ms "
+                f"(median of {options['runs']}, status {stats['status']})"
+            )
+            if options['importtime']:
+                self._report_imports(env)
+
+    def _run(self, cmd, env):
+        return subprocess.run(cmd, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True)
+
+    def _report_imports(self, env, top=15):
+        result = self._run([sys.executable, '-X', 'importtime', '-c', 'import Edgemindstudio.wsgi'], env)
+        rows = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative_us, name = line[len('import time:'):].split('|')
+            rows.append((int(cumulative_us), name.rstrip()))
+        for cumulative_us, name in sorted(rows, reverse=True)[:top]:
+            self.stdout.write(f"    {cumulative_us / 1000:8.1f} ms  {name}")
@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.accounts import bulk_set_role, bulk_set_subscription_status
+from api.models import User, Subscription
+
+
+class Command(BaseCommand):
+    help = "Change the role and/or subscription status of many users in chunked bulk updates."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', help="Comma-separated user ids.")
+        parser.add_argument('--file', help="File with one user id per line.")
+        parser.add_argument('--role', choices=[choice for choice, _ in User.ROLE_CHOICES])
+        parser.add_argument(
+            '--subscription-status',
+            choices=[choice for choice, _ in Subscription._meta.get_field('status').choices],
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options['role'] and not options['subscription_status']:
+            raise CommandError("Pass --role and/or --subscription-status.")
+
+        user_ids = self._read_ids(options)
+        self.verbose = options['verbosity'] > 1
+        if options['role']:
+            report = bulk_set_role(user_ids, options['role'], chunk_size=options['chunk_size'])
+            self._print('role', report)
+        if options['subscription_status']:
+            report = bulk_set_subscription_status(
+                user_ids, options['subscription_status'], chunk_size=options['chunk_size']
+            )
+            self._print('subscription status', report)
+
+    def _read_ids(self, options):
+        raw = []
+        if options['ids']:
+            raw += options['ids'].split(',')
+        if options['file']:
+            with open(options['file']) as f:
+                raw += f.read().split()
+        try:
+            ids = [int(value) for value in raw if value.strip()]
+        except ValueError as exc:
+            raise CommandError(f"Invalid user id: {exc}")
+        if not ids:
+            raise CommandError("No user ids given; use --ids or --file.")
+        return ids
+
+    def _print(self, what, report):
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {what} for {len(report['changed'])} user(s); "
+            f"{report['unchanged']} unchanged, {len(report['missing'])} missing."
+        ))
+        if self.verbose:
+            self.stdout.write(json.dumps(report))
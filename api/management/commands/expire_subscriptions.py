@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.accounts import expire_due_subscriptions
+
+
+class Command(BaseCommand):
+    help = "Expire subscriptions past their end_date and downgrade those users to free."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--loop', action='store_true', help="Keep running as a worker, sweeping every --interval seconds.")
+        parser.add_argument('--interval', type=int, default=300)
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_due_subscriptions(chunk_size=options['chunk_size'])
+            self.stdout.write(f"Expired {expired} subscription(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.blog import rebuild_tag_counts
+
+
+class Command(BaseCommand):
+    help = "Recount BlogTag.post_count from BlogPost.tags."
+
+    def handle(self, *args, **options):
+        tags = rebuild_tag_counts()
+        self.stdout.write(self.style.SUCCESS(f"Recounted {tags} tags"))
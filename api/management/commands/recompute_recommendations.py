@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.recommendations import TOP_K, recompute
+
+
+class Command(BaseCommand):
+    help = "Recompute 'next course' recommendations from co-enrollment (incremental by default)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every course, not just affected ones.")
+        parser.add_argument('--top-k', type=int, default=TOP_K)
+
+    def handle(self, *args, **options):
+        updated = recompute(full=options['full'], k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(f"Updated recommendations for {updated} course(s)"))
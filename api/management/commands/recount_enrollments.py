@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.enrollment import recount_enrollments
+
+
+class Command(BaseCommand):
+    help = "Recount Course.enrollment_count from Enrollment."
+
+    def handle(self, *args, **options):
+        courses = recount_enrollments()
+        self.stdout.write(self.style.SUCCESS(f"Corrected {courses} courses"))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.github import refresh_stale
+
+
+class Command(BaseCommand):
+    help = "Refresh missing or expired GitHub metadata for AI projects."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help="Max projects per batch.")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--loop', action='store_true', help="Keep running as a worker, every --interval seconds.")
+        parser.add_argument('--interval', type=int, default=300)
+
+    def handle(self, *args, **options):
+        while True:
+            refreshed, failed = refresh_stale(limit=options['limit'], concurrency=options['concurrency'])
+            self.stdout.write(f"Refreshed {refreshed} project(s), {failed} failed")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.analytics import backfill_course_days, backfill_lesson_stats, rollup_recent
+
+
+class Command(BaseCommand):
+    help = "Roll up course/lesson analytics into the daily summary tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true', help="Recompute the full history instead of recent days.")
+        parser.add_argument('--lessons', action='store_true', help="Also rebuild per-lesson completion stats.")
+        parser.add_argument('--chunk-days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            rows = backfill_course_days(chunk_days=options['chunk_days'], stdout=self.stdout)
+        else:
+            rows = rollup_recent()
+        self.stdout.write(self.style.SUCCESS(f"Upserted {rows} course-day rows"))
+
+        if options['lessons']:
+            rows = backfill_lesson_stats(chunk_days=options['chunk_days'], stdout=self.stdout)
+            self.stdout.write(self.style.SUCCESS(f"Upserted {rows} lesson-day rows"))
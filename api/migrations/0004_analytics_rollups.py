@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_usercourseprogress_completed_lessons'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('enrollments', models.PositiveIntegerField(default=0)),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('active_users', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='api.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='api_coursed_date_4dc78c_idx')],
+                'unique_together': {('course', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LessonDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lesson_daily_stats', to='api.course')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='api.lesson')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'date'], name='api_lessond_course__86594b_idx')],
+                'unique_together': {('lesson', 'date')},
+            },
+        ),
+    ]
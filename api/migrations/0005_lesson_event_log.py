@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:32
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('view', 'View'), ('heartbeat', 'Heartbeat'), ('position', 'Video Position'), ('complete', 'Complete')], max_length=10)),
+                ('position', models.PositiveIntegerField(blank=True, null=True)),
+                ('duration', models.PositiveSmallIntegerField(default=0)),
+                ('occurred_at', models.DateTimeField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lesson_events', to='api.course')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='api.lesson')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lesson_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.BrinIndex(fields=['occurred_at'], name='api_lessone_occurre_a79aff_brin'), models.Index(fields=['user', 'lesson', 'occurred_at'], name='api_lessone_user_id_979887_idx')],
+            },
+        ),
+    ]
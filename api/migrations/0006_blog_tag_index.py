@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:34
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def _clean(tags):
+    # Same rules as api.blog.clean_tags
+    cleaned = []
+    for tag in tags or []:
+        name = str(tag).strip()
+        if name and len(name) <= 100 and name not in cleaned:
+            cleaned.append(name)
+    return cleaned
+
+
+def count_existing_tags(apps, schema_editor):
+    BlogPost = apps.get_model('api', 'BlogPost')
+    BlogTag = apps.get_model('api', 'BlogTag')
+    counts = {}
+    for post in BlogPost.objects.only('tags').iterator():
+        tags = _clean(post.tags if isinstance(post.tags, list) else [])
+        if tags != post.tags:
+            # Store tags the way the API now writes them, so ?tag= filters match the counts
+            BlogPost.objects.filter(pk=post.pk).update(tags=tags)
+        for tag in tags:
+            counts[tag] = counts.get(tag, 0) + 1
+    BlogTag.objects.bulk_create([BlogTag(name=name, post_count=n) for name, n in counts.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_lesson_event_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tags'], name='api_blogpos_tags_7668fe_gin'),
+        ),
+        migrations.RunPython(count_existing_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:35
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def count_enrollments(apps, schema_editor):
+    Course = apps.get_model('api', 'Course')
+    Enrollment = apps.get_model('api', 'Enrollment')
+    counts = (
+        Enrollment.objects.filter(course=OuterRef('pk'))
+        .order_by().values('course').annotate(n=Count('id')).values('n')
+    )
+    Course.objects.filter(enrollments__isnull=False).distinct().update(enrollment_count=Subquery(counts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_blog_tag_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_enrollments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:37
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def copy_end_dates(apps, schema_editor):
+    User = apps.get_model('api', 'User')
+    Subscription = apps.get_model('api', 'Subscription')
+    end_date = Subscription.objects.filter(user=OuterRef('pk')).values('end_date')[:1]
+    User.objects.filter(subscription__status='active').update(premium_until=Subquery(end_date))
+    # Expired subscriptions must not leave premium_until empty, which reads as "no end date".
+    User.objects.filter(subscription__status='expired').update(
+        premium_until=Coalesce(Subquery(end_date), Value(timezone.now(), output_field=models.DateTimeField()))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_course_enrollment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='premium_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['status', 'end_date'], name='api_subscri_status_b09bc1_idx'),
+        ),
+        migrations.RunPython(copy_end_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_subscription_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payment_method', models.CharField(max_length=10)),
+                ('cohort', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payments', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'created_at'], name='api_payment_status_268a01_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', 'created_at'], name='api_payment_user_id_a1e894_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='revenuedailystats',
+            unique_together={('date', 'payment_method', 'cohort')},
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:40
+
+import api.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_payment_revenue_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='profile_picture',
+            field=api.models.ContentHashedImageField(blank=True, null=True, upload_to=api.models.profile_picture_path),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_course_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GitHubRepoMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repo', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('stars', models.PositiveIntegerField(default=0)),
+                ('language', models.CharField(blank=True, max_length=100)),
+                ('pushed_at', models.DateTimeField(blank=True, null=True)),
+                ('fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='github', to='api.aiproject')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:48
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_completed_at(apps, schema_editor):
+    # Best available date for courses completed before the column existed.
+    UserCourseProgress = apps.get_model('api', 'UserCourseProgress')
+    UserCourseProgress.objects.filter(completed=True, completed_at__isnull=True).update(
+        completed_at=F('last_accessed')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_github_repo_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercourseprogress',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_progress_completed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessonevent',
+            name='client_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
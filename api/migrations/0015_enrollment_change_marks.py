@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_lesson_event_client_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentRemoval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='recommendationrun',
+            name='enrollment_mark',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['enrolled_at'], name='api_enrollm_enrolle_e160fb_idx'),
+        ),
+    ]
@@ -1,8 +1,42 @@
 # api/models.py
 
+import hashlib
+import os
+
 from django.db import models
 from django.db import models
+from django.db.models.fields.files import ImageFieldFile
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+
+class ContentHashedImageFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        # Name the file by the bytes being saved, so media can be served as immutable.
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        hashed = f'{digest.hexdigest()[:32]}{os.path.splitext(name)[1].lower()}'
+        path = self.field.generate_filename(self.instance, hashed)
+        if not self.storage.exists(path):
+            super().save(hashed, content, save)
+            return
+        # Same bytes are already stored: point at that file rather than letting
+        # the storage write a copy with a random suffix.
+        self.name = path
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+        if save:
+            self.instance.save()
+
+
+class ContentHashedImageField(models.ImageField):
+    attr_class = ContentHashedImageFieldFile
+
+
+def profile_picture_path(instance, filename):
+    # `filename` is already the content hash (see ContentHashedImageFieldFile)
+    return f'profile_pics/{filename}'
 
 # User Model with Custom Roles
 class User(AbstractUser):
@@ -12,10 +46,20 @@ class User(AbstractUser):
         ('admin', 'Admin'),
     ]
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='free')
-    profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_picture = ContentHashedImageField(upload_to=profile_picture_path, blank=True, null=True)
+    # Mirrors the active subscription's end_date (None = no expiry), so access
+    # checks never need to query Subscription. See api/accounts.py.
+    premium_until = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def has_premium_access(self, now=None):
+        if self.role == 'admin':
+            return True
+        if self.role != 'premium':
+            return False
+        return self.premium_until is None or self.premium_until > (now or timezone.now())
+
 # Subscription Model
 class Subscription(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='subscription')
@@ -29,6 +73,10 @@ class Subscription(models.Model):
     start_date = models.DateTimeField(auto_now_add=True)
     end_date = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        # Expiry sweeps scan active subscriptions by end_date (api/accounts.py)
+        indexes = [models.Index(fields=['status', 'end_date'])]
+
 # Payment Model
 class Payment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payments')
@@ -37,6 +85,13 @@ class Payment(models.Model):
     status = models.CharField(max_length=10, choices=[('success', 'Success'), ('pending', 'Pending'), ('failed', 'Failed')])
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Revenue reports and rollup backfills range-scan by status and date
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['user', 'created_at']),
+        ]
+
 # Course Model
 class Course(models.Model):
     title = models.CharField(max_length=255)
@@ -44,6 +99,7 @@ class Course(models.Model):
     instructor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='courses')
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     access_type = models.CharField(max_length=10, choices=[('free', 'Free'), ('premium', 'Premium')])
+    enrollment_count = models.PositiveIntegerField(default=0)  # maintained by api/enrollment.py
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -64,6 +120,7 @@ class UserCourseProgress(models.Model):
     progress_percentage = models.FloatField(default=0.0)
     completed_lessons = models.ManyToManyField(Lesson, blank=True)
     completed = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(null=True, blank=True)  # set once, when the course is first completed
     last_accessed = models.DateTimeField(auto_now=True)
 
 
@@ -109,6 +166,15 @@ class BlogPost(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Backs tags__contains / tags__has_any_keys filtering (see BlogPostViewSet)
+        indexes = [GinIndex(fields=['tags'])]
+
+# Blog Tag counts (kept in sync incrementally by api/signals.py)
+class BlogTag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    post_count = models.PositiveIntegerField(default=0)
+
 # Enrollment Model
 class Enrollment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='enrollments')
@@ -117,3 +183,96 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ('user', 'course')
+        # Rollups and recommendation runs scan recent enrollments by time
+        indexes = [models.Index(fields=['enrolled_at'])]
+
+# Analytics Rollups (daily summaries, see api/analytics.py)
+class CourseDailyStats(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    enrollments = models.PositiveIntegerField(default=0)
+    completions = models.PositiveIntegerField(default=0)
+    active_users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('course', 'date')
+        indexes = [models.Index(fields=['date'])]
+
+class LessonDailyStats(models.Model):
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='daily_stats')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lesson_daily_stats')
+    date = models.DateField()
+    completions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('lesson', 'date')
+        indexes = [models.Index(fields=['course', 'date'])]
+
+# Learning Event Log (append-only, written in batches by api/activity.py)
+class LessonEvent(models.Model):
+    EVENT_TYPES = [
+        ('view', 'View'),
+        ('heartbeat', 'Heartbeat'),
+        ('position', 'Video Position'),
+        ('complete', 'Complete'),
+    ]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='lesson_events')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lesson_events')
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='events')
+    event_type = models.CharField(max_length=10, choices=EVENT_TYPES)
+    position = models.PositiveIntegerField(null=True, blank=True)  # video position, seconds
+    duration = models.PositiveSmallIntegerField(default=0)  # time spent since last event, seconds
+    occurred_at = models.DateTimeField()  # server receive time; keeps the BRIN index in insert order
+    client_time = models.DateTimeField(null=True, blank=True)  # as reported by the client, untrusted
+
+    class Meta:
+        indexes = [
+            BrinIndex(fields=['occurred_at']),
+            models.Index(fields=['user', 'lesson', 'occurred_at']),
+        ]
+
+# Revenue Rollups (kept current by api/signals.py, rebuilt by api/revenue.py)
+class RevenueDailyStats(models.Model):
+    date = models.DateField()
+    payment_method = models.CharField(max_length=10)
+    cohort = models.DateField()  # first day of the month the paying user signed up
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'payment_method', 'cohort')
+
+# Course Recommendations (precomputed top-K neighbors, see api/recommendations.py)
+class CourseRecommendation(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ('course', 'rank')
+
+class RecommendationRun(models.Model):
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    courses_updated = models.PositiveIntegerField(default=0)
+    # Highest Enrollment id the run had seen (see api/recommendations.py)
+    enrollment_mark = models.BigIntegerField(default=0)
+
+class EnrollmentRemoval(models.Model):
+    # Written by the Enrollment post_delete signal, consumed by recommendation
+    # runs. Plain ids, not FKs: the course or user may be deleted right after.
+    course_id = models.BigIntegerField()
+    user_id = models.BigIntegerField()
+
+# GitHub metadata cache for AI projects (refreshed in the background by api/github.py)
+class GitHubRepoMetadata(models.Model):
+    project = models.OneToOneField(AIProject, on_delete=models.CASCADE, related_name='github')
+    repo = models.CharField(max_length=255)  # "owner/name" the metadata was fetched for
+    description = models.TextField(blank=True)
+    stars = models.PositiveIntegerField(default=0)
+    language = models.CharField(max_length=100, blank=True)
+    pushed_at = models.DateTimeField(null=True, blank=True)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    error = models.CharField(max_length=255, blank=True)
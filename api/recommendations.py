@@ -0,0 +1,149 @@
+# api/recommendations.py
+
+"""
+"Next course" recommendations from co-enrollment.
+
+A sparse course x user matrix is built from Enrollment, item-item cosine
+similarity is computed
+with one sparse matrix product, and the top-K neighbors of every course are
+stored in CourseRecommendation for the API to read in one query.
+
+Incremental runs only recompute courses whose similarities can have
+changed: courses with enrollments added or removed since the last run, the
+other courses of those learners, and every course that shares a learner
+with any of them.
+
+Added enrollments are those past the last run's highest Enrollment id, plus
+any enrolled within RECOMMENDATION_RESCAN_WINDOW before that run started:
+ids are assigned at INSERT but become visible at COMMIT, so a lower id can
+appear after the run read the mark. Removals are EnrollmentRemoval rows
+(written by the post_delete signal); a run deletes exactly the rows it read,
+so one committed mid-run is left for the next.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import CourseRecommendation, Enrollment, EnrollmentRemoval, RecommendationRun
+
+TOP_K = 10
+
+
+def build_matrix(course_ids, user_ids):
+    """
+    Binary CSR matrix (courses x users) from parallel arrays of pairs.
+    Returns (matrix, course index -> course id array).
+    """
+    courses, course_rows = np.unique(np.asarray(course_ids, dtype=np.int64), return_inverse=True)
+    _, user_cols = np.unique(np.asarray(user_ids, dtype=np.int64), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(course_rows), dtype=np.float32), (course_rows, user_cols)),
+        shape=(len(courses), user_cols.max() + 1 if len(user_cols) else 0),
+    )
+    matrix.data[:] = 1.0  # duplicates were summed; keep it binary
+    return matrix, courses
+
+
+def top_neighbors(matrix, rows, k=TOP_K):
+    """
+    Cosine top-k neighbors for the given row indexes of `matrix`.
+    Returns {row: [(neighbor_row, score), ...]} best first, excluding self.
+    """
+    sizes = np.asarray(matrix.getnnz(axis=1), dtype=np.float32)
+    co = (matrix[rows] @ matrix.T).tocsr()  # co-enrollment counts
+
+    result = {}
+    for i, row in enumerate(rows):
+        start, end = co.indptr[i], co.indptr[i + 1]
+        neighbors = co.indices[start:end]
+        scores = co.data[start:end] / np.sqrt(sizes[row] * sizes[neighbors])
+        keep = neighbors != row
+        neighbors, scores = neighbors[keep], scores[keep]
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+            neighbors, scores = neighbors[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        result[row] = list(zip(neighbors[order].tolist(), scores[order].tolist()))
+    return result
+
+
+def _load_pairs():
+    pairs = list(Enrollment.objects.values_list('course_id', 'user_id').iterator(chunk_size=10000))
+    if not pairs:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pairs = np.array(pairs, dtype=np.int64)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def _rescan_window():
+    return timedelta(seconds=getattr(settings, 'RECOMMENDATION_RESCAN_WINDOW', 5 * 60))
+
+
+def _changed_courses(last_run, removals):
+    added = Enrollment.objects.filter(
+        Q(id__gt=last_run.enrollment_mark) | Q(enrolled_at__gte=last_run.started_at - _rescan_window())
+    )
+    changed = set(added.values_list('course_id', flat=True).distinct())
+    changed.update(course_id for _, course_id, _ in removals)
+    # A removed pair no longer links its course to the learner's other
+    # courses in the matrix, so those have to be named explicitly.
+    changed.update(
+        Enrollment.objects.filter(user_id__in={user_id for _, _, user_id in removals})
+        .values_list('course_id', flat=True).distinct()
+    )
+    return changed
+
+
+def recompute(full=False, k=TOP_K):
+    """
+    Refresh CourseRecommendation. Without `full`, only courses affected by
+    enrollments since the previous run are recomputed. Returns the number of
+    courses whose recommendations were rewritten.
+    """
+    started = timezone.now()
+    last_run = RecommendationRun.objects.filter(finished_at__isnull=False).order_by('-started_at').first()
+    enrollment_mark = Enrollment.objects.aggregate(mark=Max('id'))['mark'] or 0
+    removals = list(EnrollmentRemoval.objects.values_list('id', 'course_id', 'user_id'))
+
+    course_ids, user_ids = _load_pairs()
+    matrix, courses = build_matrix(course_ids, user_ids)
+    row_of = {course_id: row for row, course_id in enumerate(courses.tolist())}
+
+    if full or last_run is None:
+        rows = np.arange(len(courses))
+    else:
+        changed = [row_of[c] for c in _changed_courses(last_run, removals) if c in row_of]
+        if changed:
+            # Changed courses plus everything sharing a learner with them
+            rows = np.unique((matrix[changed] @ matrix.T).tocoo().col)
+        else:
+            rows = np.empty(0, dtype=np.int64)
+
+    neighbors = top_neighbors(matrix, rows, k=k) if len(rows) else {}
+    updated = [int(courses[row]) for row in neighbors]
+
+    with transaction.atomic():
+        if full or last_run is None:
+            CourseRecommendation.objects.all().delete()
+        else:
+            CourseRecommendation.objects.filter(course_id__in=updated).delete()
+        CourseRecommendation.objects.bulk_create(
+            [
+                CourseRecommendation(course_id=int(courses[row]), recommended_id=int(courses[n]), score=score, rank=rank)
+                for row, ranked in neighbors.items()
+                for rank, (n, score) in enumerate(ranked, start=1)
+            ],
+            batch_size=5000,
+        )
+        EnrollmentRemoval.objects.filter(id__in=[pk for pk, _, _ in removals]).delete()
+        RecommendationRun.objects.create(
+            started_at=started, finished_at=timezone.now(), courses_updated=len(updated),
+            enrollment_mark=enrollment_mark,
+        )
+    return len(updated)
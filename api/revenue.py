@@ -0,0 +1,136 @@
+# api/revenue.py
+
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateField, F, Min, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import Payment, RevenueDailyStats, User
+
+
+def _day_bounds(start, end):
+    """Aware datetimes covering [start, end] so created_at filters stay index range scans."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def signup_cohort(user_id):
+    """First day of the (local) month `user_id` signed up, the cohort key of RevenueDailyStats."""
+    created_at = User.objects.filter(pk=user_id).values_list('created_at', flat=True).first()
+    return timezone.localdate(created_at).replace(day=1)
+
+
+# ---------- INCREMENTAL UPDATES ----------
+def _adjust(day, method, cohort, amount, payments):
+    stats, _ = RevenueDailyStats.objects.get_or_create(date=day, payment_method=method, cohort=cohort)
+    RevenueDailyStats.objects.filter(pk=stats.pk).update(
+        amount=F('amount') + amount, payments=F('payments') + payments
+    )
+
+
+def apply_payment_change(before, after):
+    """
+    Move a payment's contribution in RevenueDailyStats from its `before` to
+    its `after` state. Each state is a Payment (or None) and only counts when
+    its status is 'success'.
+    """
+    def key(p):
+        if p is None or p.status != 'success':
+            return None
+        return (timezone.localdate(p.created_at), p.payment_method, p.user_id, p.amount)
+
+    old, new = key(before), key(after)
+    if old == new:
+        return
+    with transaction.atomic():
+        if old:
+            _adjust(old[0], old[1], signup_cohort(old[2]), -old[3], -1)
+        if new:
+            _adjust(new[0], new[1], signup_cohort(new[2]), new[3], 1)
+
+
+# ---------- ROLLUPS ----------
+def rollup_revenue_days(start, end):
+    """Recompute RevenueDailyStats for [start, end] from successful payments."""
+    lower, upper = _day_bounds(start, end)
+    rows = [
+        RevenueDailyStats(
+            date=row['day'], payment_method=row['payment_method'], cohort=row['cohort'],
+            amount=row['amount'], payments=row['n'],
+        )
+        for row in (
+            Payment.objects
+            .filter(status='success', created_at__gte=lower, created_at__lt=upper)
+            .annotate(day=TruncDate('created_at'), cohort=TruncMonth('user__created_at', output_field=DateField()))
+            .values('day', 'payment_method', 'cohort')
+            .annotate(amount=Sum('amount'), n=Count('id'))
+        )
+    ]
+    with transaction.atomic():
+        RevenueDailyStats.objects.filter(date__gte=start, date__lte=end).update(amount=0, payments=0)
+        RevenueDailyStats.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['date', 'payment_method', 'cohort'],
+            update_fields=['amount', 'payments'],
+        )
+    return len(rows)
+
+
+def backfill_revenue(chunk_days=7, stdout=None):
+    """Rebuild the revenue rollups over the whole ledger, `chunk_days` per transaction."""
+    first = Payment.objects.filter(status='success').aggregate(first=Min('created_at'))['first']
+    if first is None:
+        return 0
+
+    start = timezone.localdate(first)
+    today = timezone.localdate()
+    total = 0
+    while start <= today:
+        end = min(start + timedelta(days=chunk_days - 1), today)
+        total += rollup_revenue_days(start, end)
+        if stdout:
+            stdout.write(f"Rolled up revenue {start} .. {end}")
+        start = end + timedelta(days=1)
+    return total
+
+
+# ---------- REPORTS ----------
+def revenue_report(start, end, method=None, group='day'):
+    stats = RevenueDailyStats.objects.filter(date__gte=start, date__lte=end)
+    if method:
+        stats = stats.filter(payment_method=method)
+
+    group_by = {'day': ['date'], 'method': ['payment_method']}.get(group, ['date', 'payment_method'])
+    rows = list(
+        stats.values(*group_by)
+        .annotate(amount=Sum('amount'), payments=Sum('payments'))
+        .order_by(*group_by)
+    )
+    return {
+        'start': start,
+        'end': end,
+        'method': method,
+        'group': group,
+        'total': sum(r['amount'] for r in rows),
+        'rows': rows,
+    }
+
+
+def cohort_report(start, end, method=None):
+    """Successful revenue in the range grouped by the month users signed up."""
+    stats = RevenueDailyStats.objects.filter(date__gte=start, date__lte=end)
+    if method:
+        stats = stats.filter(payment_method=method)
+    return list(
+        stats
+        .values('cohort')
+        .annotate(amount=Sum('amount'), payments=Sum('payments'))
+        .order_by('cohort')
+    )
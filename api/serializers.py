@@ -2,8 +2,9 @@
 
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
-from .models import UserCourseProgress
-from .models import User, Course, Lesson, ForumThread, ForumReply, BlogPost, AIProject, Comment, Enrollment
+from .models import UserCourseProgress, LessonEvent, Subscription, GitHubRepoMetadata
+from .models import User, Course, Lesson, ForumThread, ForumReply, BlogPost, BlogTag, AIProject, Comment, Enrollment
+from .blog import TAG_MAX_LENGTH, clean_tags
 
 # ---------- USER ----------
 class UserSerializer(serializers.ModelSerializer):
@@ -26,6 +27,14 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         model = User
         fields = ['username', 'email', 'profile_picture']
 
+class BulkUserRoleSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=100000)
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES)
+
+class BulkSubscriptionStatusSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=100000)
+    status = serializers.ChoiceField(choices=Subscription._meta.get_field('status').choices)
+
 # ---------- COURSES ----------
 class CourseSerializer(serializers.ModelSerializer):
     instructor_username = serializers.CharField(source='instructor.username', read_only=True)
@@ -40,10 +49,11 @@ class CourseSerializer(serializers.ModelSerializer):
             'instructor_username',
             'price',
             'access_type',
+            'enrollment_count',
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['enrollment_count', 'created_at', 'updated_at']
 
 # ---------- LESSON ----------
 class LessonSerializer(serializers.ModelSerializer):
@@ -63,11 +73,29 @@ class ForumReplySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class BlogPostSerializer(serializers.ModelSerializer):
+    tags = serializers.ListField(child=serializers.CharField(max_length=TAG_MAX_LENGTH), required=False)
+
     class Meta:
         model = BlogPost
         fields = '__all__'
 
+    def validate_tags(self, value):
+        return clean_tags(value)
+
+class BlogTagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BlogTag
+        fields = ['name', 'post_count']
+
+class GitHubRepoMetadataSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GitHubRepoMetadata
+        fields = ['repo', 'description', 'stars', 'language', 'pushed_at', 'fetched_at']
+
 class AIProjectSerializer(serializers.ModelSerializer):
+    # Cached metadata only; refreshed by `manage.py refresh_github_metadata`
+    github = GitHubRepoMetadataSerializer(read_only=True)
+
     class Meta:
         model = AIProject
         fields = '__all__'
@@ -87,3 +115,15 @@ class UserCourseProgressSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserCourseProgress
         fields = '__all__'
+
+
+# ---------- LEARNING EVENTS ----------
+class LessonEventSerializer(serializers.Serializer):
+    lesson = serializers.IntegerField()
+    type = serializers.ChoiceField(choices=[choice for choice, _ in LessonEvent.EVENT_TYPES])
+    position = serializers.IntegerField(min_value=0, max_value=24 * 60 * 60, required=False, allow_null=True)  # seconds
+    duration = serializers.IntegerField(min_value=0, max_value=3600, required=False, default=0)
+    timestamp = serializers.DateTimeField(required=False)
+
+class LessonEventBatchSerializer(serializers.Serializer):
+    events = LessonEventSerializer(many=True, allow_empty=False, max_length=500)
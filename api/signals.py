@@ -0,0 +1,93 @@
+# api/signals.py
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import AIProject, BlogPost, Enrollment, ForumReply, Payment, Subscription
+from . import accounts, blog, enrollment, revenue
+
+
+@receiver(pre_save, sender=BlogPost)
+def remember_blog_tags(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._previous_tags = set()
+    else:
+        previous = BlogPost.objects.filter(pk=instance.pk).values_list('tags', flat=True).first()
+        instance._previous_tags = blog.tag_set(previous)
+
+
+@receiver(post_save, sender=BlogPost)
+def update_blog_tag_counts(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_tags', set())
+    current = blog.tag_set(instance.tags)
+    blog.adjust_tag_counts(added=current - previous, removed=previous - current)
+    instance._previous_tags = current
+
+
+@receiver(post_delete, sender=BlogPost)
+def release_blog_tags(sender, instance, **kwargs):
+    blog.adjust_tag_counts(removed=blog.tag_set(instance.tags))
+
+
+@receiver(post_delete, sender=Enrollment)
+def release_enrollment(sender, instance, **kwargs):
+    enrollment.release(instance.course_id, instance.user_id)
+
+
+@receiver(pre_save, sender=Subscription)
+def remember_subscription_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if instance.pk is not None:
+        instance._previous_status = (
+            Subscription.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Subscription)
+def sync_subscription_status(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # An active row may have a new end_date; an expired one only needs the
+    # transition once, not on every later save.
+    if instance.status == 'active' or instance.status != getattr(instance, '_previous_status', None):
+        accounts.apply_subscription_status([instance.user_id], instance.status)
+
+
+@receiver(pre_save, sender=Payment)
+def remember_payment_state(sender, instance, **kwargs):
+    instance._previous_state = None
+    if instance.pk is not None:
+        instance._previous_state = (
+            Payment.objects.only('status', 'amount', 'payment_method', 'created_at')
+            .filter(pk=instance.pk).first()
+        )
+
+
+@receiver(post_save, sender=Payment)
+def update_revenue_stats(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    revenue.apply_payment_change(getattr(instance, '_previous_state', None), instance)
+
+
+@receiver(post_delete, sender=Payment)
+def release_revenue_stats(sender, instance, **kwargs):
+    revenue.apply_payment_change(instance, None)
+
+
+@receiver(post_save, sender=ForumReply)
+def publish_forum_reply(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        # Imported here: streams pulls in the serializers, which management
+        # commands and migrations never need.
+        from . import streams
+        streams.get_hub().broker.publish(instance)
+
+
+@receiver(post_save, sender=AIProject)
+def expire_github_metadata(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        from . import github
+        github.expire_if_repo_changed(instance)
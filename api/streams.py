@@ -0,0 +1,211 @@
+# api/streams.py
+
+"""
+Server-sent events for forum replies.
+
+Every SSE connection in a process subscribes to one shared ReplyHub. The hub
+runs a single broker listener while anyone is subscribed and fans each new
+reply out to the watchers of its thread, so N watchers cost one query stream
+instead of N polling clients.
+
+Brokers:
+- PollingBroker (default): one query per interval for all threads; works
+  across processes with nothing but the database. Each poll re-scans ids
+  above the high-water mark from FORUM_STREAM_RESCAN_WINDOW seconds ago, so
+  replies whose transaction commits after a higher id are still delivered.
+- InProcessBroker: replies are pushed from the ForumReply post_save signal;
+  only sees replies created in the same process, so it's meant for tests
+  and single-process development.
+
+Select with settings.FORUM_STREAM_BROKER (dotted path). Streams need ASGI:
+under WSGI every open stream would pin a worker, so the view answers 501.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict, deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+from .models import ForumReply
+from .serializers import ForumReplySerializer
+
+HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments
+SUBSCRIBER_QUEUE_SIZE = 1000
+BROKER_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+def _serialize(replies):
+    return ForumReplySerializer(replies, many=True).data
+
+
+def replies_after(thread_id, last_id, limit=BROKER_BATCH_SIZE):
+    return _serialize(ForumReply.objects.filter(thread_id=thread_id, id__gt=last_id).order_by('id')[:limit])
+
+
+# ---------- BROKERS ----------
+class PollingBroker:
+    def __init__(self):
+        self.interval = getattr(settings, 'FORUM_STREAM_POLL_INTERVAL', 1.0)
+        self.window = getattr(settings, 'FORUM_STREAM_RESCAN_WINDOW', 10.0)
+
+    def publish(self, reply):
+        pass  # picked up by the next poll
+
+    def _latest_id(self):
+        return ForumReply.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def _fetch(self, floor, seen):
+        replies = ForumReply.objects.filter(id__gt=floor).exclude(id__in=seen).order_by('id')
+        return _serialize(replies[:BROKER_BATCH_SIZE])
+
+    async def listen(self):
+        # Ids are assigned at INSERT but become visible at COMMIT, so a lower
+        # id can show up after a higher one. Instead of `id > last seen`, scan
+        # from the highest id seen `window` seconds ago and skip ids already
+        # delivered since then.
+        floor = high = await sync_to_async(self._latest_id)()
+        seen = set()
+        marks = deque()  # (monotonic time, highest id delivered by then)
+        while True:
+            for reply in await sync_to_async(self._fetch)(floor, seen):
+                seen.add(reply['id'])
+                high = max(high, reply['id'])
+                yield reply
+
+            now = time.monotonic()
+            marks.append((now, high))
+            while marks and marks[0][0] <= now - self.window:
+                floor = max(floor, marks.popleft()[1])
+            seen = {pk for pk in seen if pk > floor}
+            await asyncio.sleep(self.interval)
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._loop = None
+        self._queue = None
+
+    def publish(self, reply):
+        # Called from sync code (signals), possibly on another thread.
+        if self._loop is not None and not self._loop.is_closed():
+            data = _serialize([reply])[0]
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, data)
+
+    async def listen(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        try:
+            while True:
+                yield await self._queue.get()
+        finally:
+            self._loop = None
+
+
+# ---------- HUB ----------
+class ReplyHub:
+    def __init__(self, broker):
+        self.broker = broker
+        self.subscribers = defaultdict(set)
+        self._task = None
+
+    def subscribe(self, thread_id):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers[thread_id].add(queue)
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, thread_id, queue):
+        watchers = self.subscribers.get(thread_id)
+        if watchers is not None:
+            watchers.discard(queue)
+            if not watchers:
+                del self.subscribers[thread_id]
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @staticmethod
+    def _close(queue):
+        """End one stream; its client resumes from Last-Event-ID."""
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def _run(self):
+        try:
+            async for reply in self.broker.listen():
+                for queue in list(self.subscribers.get(reply['thread'], ())):
+                    try:
+                        queue.put_nowait(reply)
+                    except asyncio.QueueFull:
+                        # Too slow to keep up: end its stream, the client
+                        # catches up from the database when it reconnects.
+                        self._close(queue)
+        except Exception:
+            logger.exception('Forum reply broker failed')
+        # The broker is gone: close every stream instead of leaving clients
+        # on keep-alives forever. The next subscriber starts a new listener.
+        for watchers in list(self.subscribers.values()):
+            for queue in list(watchers):
+                self._close(queue)
+
+
+_hub = None
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        broker = import_string(getattr(settings, 'FORUM_STREAM_BROKER', 'api.streams.PollingBroker'))
+        _hub = ReplyHub(broker())
+    return _hub
+
+
+# ---------- SSE ----------
+def _event(reply):
+    return f"id: {reply['id']}\nevent: reply\ndata: {json.dumps(reply, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def reply_events(thread_id, last_id=None):
+    """
+    Async iterator of SSE frames for one thread. Replies after `last_id` are
+    replayed from the database first, then new replies follow live.
+    """
+    hub = get_hub()
+    queue = hub.subscribe(thread_id)
+    try:
+        replayed = set()  # live replies can overlap the backlog
+        if last_id is not None:
+            after = last_id
+            while True:
+                backlog = await sync_to_async(replies_after)(thread_id, after)
+                for reply in backlog:
+                    after = reply['id']
+                    replayed.add(after)
+                    yield _event(reply)
+                if len(backlog) < BROKER_BATCH_SIZE:
+                    break
+
+        yield ": connected\n\n"
+        while True:
+            try:
+                reply = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if reply is None:
+                return
+            if reply['id'] not in replayed:
+                yield _event(reply)
+    finally:
+        hub.unsubscribe(thread_id, queue)
@@ -1,3 +1,838 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from . import accounts, analytics, github, idempotency, recommendations, streams
+from .activity import LAST_ACCESSED_RESOLUTION, complete_lesson, ingest_events
+from .enrollment import enroll, recount_enrollments
+from .models import (
+    AIProject, BlogPost, BlogTag, Course, CourseDailyStats, CourseRecommendation, Enrollment, EnrollmentRemoval, ForumReply,
+    ForumThread, GitHubRepoMetadata, Lesson, LessonDailyStats, LessonEvent, Payment, RecommendationRun, RevenueDailyStats,
+    Subscription, User, UserCourseProgress,
+)
+from .revenue import cohort_report, rollup_revenue_days
+
+
+def make_course(instructor, **kwargs):
+    kwargs.setdefault('title', 'Course')
+    kwargs.setdefault('description', 'Description')
+    kwargs.setdefault('access_type', 'free')
+    return Course.objects.create(instructor=instructor, **kwargs)
+
+
+# ---------- ENROLLMENT ----------
+@skipIf(connection.vendor == 'sqlite', 'SQLite serializes writers; run against PostgreSQL')
+class ConcurrentEnrollmentTests(TransactionTestCase):
+    workers = 8
+
+    def setUp(self):
+        self.instructor = User.objects.create(username='instructor', role='staff')
+        self.student = User.objects.create(username='student')
+        self.course = make_course(self.instructor)
+
+    def test_concurrent_enroll_creates_one_row(self):
+        barrier = threading.Barrier(self.workers)
+
+        def attempt(_):
+            try:
+                barrier.wait()
+                return enroll(self.student, self.course.pk)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # .result() re-raises anything a worker hit, IntegrityError included
+            results = [f.result() for f in [pool.submit(attempt, i) for i in range(self.workers)]]
+
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(Enrollment.objects.filter(user=self.student, course=self.course).count(), 1)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+
+class EnrollmentCountTests(TestCase):
+    def setUp(self):
+        self.instructor = User.objects.create(username='instructor', role='staff')
+        self.student = User.objects.create(username='student')
+        self.course = make_course(self.instructor)
+
+    def test_delete_releases_count(self):
+        enroll(self.student, self.course.pk)
+        Enrollment.objects.filter(user=self.student).delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 0)
+
+    def test_cascade_delete_releases_count(self):
+        enroll(self.student, self.course.pk)
+        self.student.delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 0)
+
+    def test_recount_repairs_drift(self):
+        enroll(self.student, self.course.pk)
+        Course.objects.filter(pk=self.course.pk).update(enrollment_count=5)
+        self.assertEqual(recount_enrollments(), 1)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+    def test_enroll_is_idempotent(self):
+        self.assertTrue(enroll(self.student, self.course.pk))
+        try:
+            self.assertFalse(enroll(self.student, self.course.pk))
+        except IntegrityError:
+            self.fail('second enroll() hit the unique constraint')
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        instructor = User.objects.create(username='instructor', role='staff')
+        self.student = User.objects.create(username='student')
+        self.first = make_course(instructor, title='First')
+        self.second = make_course(instructor, title='Second')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        cache.clear()
+
+    def post(self, course, key):
+        return self.client.post('/api/enroll/', {'course': course.pk}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_first_response(self):
+        first = self.post(self.first, 'key-1')
+        retry = self.post(self.first, 'key-1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+    def test_key_reused_with_different_body_is_rejected(self):
+        self.post(self.first, 'key-1')
+        response = self.post(self.second, 'key-1')
+        self.assertEqual(response.status_code, 422)
+        self.assertFalse(Enrollment.objects.filter(user=self.student, course=self.second).exists())
+
+    def test_retry_while_first_request_runs_gets_409(self):
+        cache.add(idempotency._cache_key(self.student.pk, '/api/enroll/', 'key-1'), idempotency.IN_FLIGHT)
+        response = self.post(self.first, 'key-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Enrollment.objects.filter(user=self.student).exists())
+
+    def test_claim_is_released_when_the_view_fails(self):
+        with mock.patch('api.enrollment.enroll', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.post(self.first, 'key-1')
+        self.assertEqual(self.post(self.first, 'key-1').status_code, 201)
+
+    def test_long_keys_are_hashed(self):
+        self.assertEqual(self.post(self.first, 'k' * 1000).status_code, 201)
+        self.assertEqual(self.post(self.first, 'k' * 1000)['Idempotent-Replayed'], 'true')
+
+
+# ---------- ANALYTICS ----------
+class AnalyticsRollupTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.course = make_course(self.admin)
+        self.lessons = [
+            Lesson.objects.create(course=self.course, title=f'L{i}', video_url='http://example.com/v', content='x', order=i)
+            for i in (1, 2)
+        ]
+        self.learners = [User.objects.create(username=f'learner{i}') for i in range(2)]
+        for learner in self.learners:
+            enroll(learner, self.course.pk)
+
+    def day_stats(self, day):
+        return CourseDailyStats.objects.filter(course=self.course, date=day).values(
+            'enrollments', 'completions', 'active_users'
+        ).first()
+
+    def test_course_day_counts(self):
+        for lesson in self.lessons:
+            complete_lesson(self.learners[0], lesson)
+        analytics.rollup_course_days(self.today, self.today)
+        self.assertEqual(self.day_stats(self.today), {'enrollments': 2, 'completions': 1, 'active_users': 1})
+
+    def test_completion_stays_on_its_day_when_progress_is_touched_later(self):
+        for lesson in self.lessons:
+            complete_lesson(self.learners[0], lesson)
+        UserCourseProgress.objects.update(completed_at=timezone.now() - timedelta(days=1))
+        LessonEvent.objects.update(occurred_at=timezone.now() - timedelta(days=1))
+
+        analytics.rollup_course_days(self.yesterday, self.today)
+        self.assertEqual(self.day_stats(self.yesterday)['completions'], 1)
+        self.assertEqual(self.day_stats(self.today)['completions'], 0)
+        self.assertEqual(self.day_stats(self.today)['active_users'], 0)
+
+    def test_lesson_backfill_dates_first_completion_and_keeps_funnel(self):
+        first, second = self.lessons
+        complete_lesson(self.learners[0], first)
+        complete_lesson(self.learners[0], second)
+        complete_lesson(self.learners[1], first)
+        LessonEvent.objects.filter(user=self.learners[0]).update(occurred_at=timezone.now() - timedelta(days=1))
+        # A repeated 'complete' from the client later on is not a new completion
+        LessonEvent.objects.create(
+            user=self.learners[0], course=self.course, lesson=first, event_type='complete', occurred_at=timezone.now()
+        )
+
+        self.assertEqual(analytics.backfill_lesson_stats(chunk_days=1), 3)
+        self.assertEqual(
+            sorted(LessonDailyStats.objects.filter(completions__gt=0).values_list('lesson_id', 'date', 'completions')),
+            sorted([(first.pk, self.yesterday, 1), (second.pk, self.yesterday, 1), (first.pk, self.today, 1)]),
+        )
+        funnel = analytics.course_funnel(self.course)
+        self.assertEqual([(row['learners'], row['drop_off']) for row in funnel], [(2, 0), (1, 1)])
+
+    def test_lesson_backfill_dates_legacy_completions_by_progress(self):
+        complete_lesson(self.learners[0], self.lessons[0])
+        LessonEvent.objects.all().delete()
+        UserCourseProgress.objects.update(completed_at=timezone.now() - timedelta(days=1))
+
+        analytics.backfill_lesson_stats()
+        self.assertEqual(
+            list(LessonDailyStats.objects.filter(completions__gt=0).values_list('date', 'completions')), [(self.yesterday, 1)]
+        )
+
+    def test_report_range_rejects_bad_dates(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        for query in ('start=garbage', 'start=2024-02-30', 'end=2024-13-01', 'start=2024-02-02&end=2024-02-01'):
+            self.assertEqual(client.get(f'/api/analytics/overview/?{query}').status_code, 400, query)
+        self.assertEqual(client.get('/api/analytics/overview/?start=2024-02-01&end=2024-02-29').status_code, 200)
+
+
+# ---------- LESSON ACTIVITY ----------
+class LessonActivityTests(TestCase):
+    def setUp(self):
+        instructor = User.objects.create(username='instructor', role='staff')
+        self.student = User.objects.create(username='student')
+        self.course = make_course(instructor)
+        self.other = make_course(instructor, title='Not enrolled')
+        self.lesson = Lesson.objects.create(
+            course=self.course, title='L1', video_url='http://example.com/v', content='x', order=1
+        )
+        self.lesson_2 = Lesson.objects.create(
+            course=self.course, title='L2', video_url='http://example.com/v', content='x', order=2
+        )
+        self.foreign = Lesson.objects.create(
+            course=self.other, title='Other', video_url='http://example.com/v', content='x', order=1
+        )
+        enroll(self.student, self.course.pk)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_events_for_courses_without_access_are_dropped(self):
+        stored = ingest_events(self.student, [
+            {'lesson': self.lesson.pk, 'type': 'view'},
+            {'lesson': self.foreign.pk, 'type': 'view'},
+            {'lesson': self.foreign.pk, 'type': 'complete'},
+        ])
+        self.assertEqual(stored, 1)
+        self.assertEqual(list(LessonEvent.objects.values_list('lesson_id', flat=True)), [self.lesson.pk])
+        self.assertFalse(UserCourseProgress.objects.filter(course=self.other).exists())
+
+    def test_duplicate_complete_events_count_once(self):
+        complete = {'lesson': self.lesson.pk, 'type': 'complete'}
+        ingest_events(self.student, [complete, complete])
+        ingest_events(self.student, [complete])
+
+        progress = UserCourseProgress.objects.get(user=self.student, course=self.course)
+        self.assertEqual(progress.completed_lessons.count(), 1)
+        self.assertEqual(progress.progress_percentage, 50.0)
+        self.assertEqual(LessonDailyStats.objects.get(lesson=self.lesson).completions, 1)
+
+    def test_heartbeats_within_resolution_do_not_touch_progress(self):
+        progress = UserCourseProgress.objects.create(user=self.student, course=self.course)
+        recent = timezone.now() - LAST_ACCESSED_RESOLUTION / 2
+        UserCourseProgress.objects.filter(pk=progress.pk).update(last_accessed=recent)
+
+        ingest_events(self.student, [{'lesson': self.lesson.pk, 'type': 'heartbeat', 'duration': 15}] * 5)
+        progress.refresh_from_db()
+        self.assertEqual(progress.last_accessed, recent)
+
+        stale = timezone.now() - LAST_ACCESSED_RESOLUTION * 2
+        UserCourseProgress.objects.filter(pk=progress.pk).update(last_accessed=stale)
+        ingest_events(self.student, [{'lesson': self.lesson.pk, 'type': 'heartbeat', 'duration': 15}])
+        progress.refresh_from_db()
+        self.assertGreater(progress.last_accessed, stale)
+
+    def test_out_of_range_position_is_a_validation_error(self):
+        response = self.client.post(
+            '/api/activity/', {'events': [{'lesson': self.lesson.pk, 'type': 'position', 'position': 3000000000}]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(LessonEvent.objects.exists())
+
+
+# ---------- BLOG ----------
+class BlogTagTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def post(self, tags, title='Post'):
+        return BlogPost.objects.create(title=title, author=self.author, content='...', tags=tags)
+
+    def counts(self):
+        return dict(BlogTag.objects.filter(post_count__gt=0).values_list('name', 'post_count'))
+
+    def titles(self, query):
+        return sorted(row['title'] for row in self.client.get(f'/api/blog-posts/?{query}').data)
+
+    def test_counts_follow_create_edit_and_delete(self):
+        first = self.post(['ml', 'edge'])
+        self.post(['ml'])
+        self.assertEqual(self.counts(), {'ml': 2, 'edge': 1})
+
+        first.tags = ['edge', 'cv']
+        first.save()
+        self.assertEqual(self.counts(), {'ml': 1, 'edge': 1, 'cv': 1})
+
+        first.delete()
+        self.assertEqual(self.counts(), {'ml': 1})
+
+    @skipIf(connection.vendor == 'sqlite', 'JSON containment lookups need PostgreSQL')
+    def test_api_normalizes_tags_and_rejects_overlong_ones(self):
+        response = self.client.post(
+            '/api/blog-posts/',
+            {'title': 'Post', 'author': self.author.pk, 'content': '...', 'tags': [' ML', 'ML', 1, 'cv ']},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['tags'], ['ML', '1', 'cv'])
+        self.assertEqual(self.counts(), {'ML': 1, '1': 1, 'cv': 1})
+        self.assertEqual(self.titles('tag=ML'), ['Post'])
+        self.assertEqual(self.titles('tag=1'), ['Post'])
+
+        response = self.client.post(
+            '/api/blog-posts/',
+            {'title': 'Long', 'author': self.author.pk, 'content': '...', 'tags': ['x' * 101]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @skipIf(connection.vendor == 'sqlite', 'JSON containment lookups need PostgreSQL')
+    def test_tag_filtering_and_or(self):
+        self.post(['ml', 'edge'], title='both')
+        self.post(['ml'], title='ml')
+        self.post(['cv'], title='cv')
+
+        self.assertEqual(self.titles('tag=ml&tag=edge'), ['both'])
+        self.assertEqual(self.titles('tag=ml,edge'), ['both'])
+        self.assertEqual(self.titles('tag= ml '), ['both', 'ml'])
+        self.assertEqual(self.titles('tag=edge,cv&match=any'), ['both', 'cv'])
+
+# ---------- SUBSCRIPTIONS ----------
+class ExpireSubscriptionsTests(TestCase):
+    def subscriber(self, username, end_date):
+        user = User.objects.create(username=username, role='premium')
+        Subscription.objects.create(user=user, subscription_type='monthly', end_date=end_date)
+        return user
+
+    def test_only_due_subscribers_are_downgraded(self):
+        now = timezone.now()
+        lapsed = self.subscriber('lapsed', now - timedelta(days=1))
+        current = self.subscriber('current', now + timedelta(days=1))
+        lifetime = self.subscriber('lifetime', None)
+
+        self.assertEqual(accounts.expire_due_subscriptions(now=now, chunk_size=1), 1)
+
+        roles = dict(User.objects.values_list('username', 'role'))
+        self.assertEqual(roles, {'lapsed': 'free', 'current': 'premium', 'lifetime': 'premium'})
+        lapsed.refresh_from_db()
+        self.assertFalse(lapsed.has_premium_access())
+        self.assertTrue(User.objects.get(pk=current.pk).has_premium_access())
+        self.assertTrue(User.objects.get(pk=lifetime.pk).has_premium_access())
+
+    def test_saving_an_expired_subscription_again_keeps_premium_until(self):
+        user = self.subscriber('lapsed', timezone.now() - timedelta(days=3))
+        subscription = user.subscription
+        subscription.status = 'expired'
+        subscription.save()
+        user.refresh_from_db()
+        self.assertEqual(user.role, 'free')
+        self.assertEqual(user.premium_until, subscription.end_date)
+
+        subscription.save()
+        user.refresh_from_db()
+        self.assertEqual(user.premium_until, subscription.end_date)
+
+
+class BulkSubscriptionStatusTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.users = []
+        for status in ('active', 'active', 'expired'):
+            user = User.objects.create(username=f'user{len(self.users)}', role='premium')
+            Subscription.objects.create(
+                user=user, subscription_type='monthly', status=status, end_date=timezone.now() + timedelta(days=5)
+            )
+            self.users.append(user)
+
+    def post(self, user_ids, status='expired'):
+        return self.client.post(
+            '/api/users/bulk-subscription-status/', {'user_ids': user_ids, 'status': status}, format='json'
+        )
+
+    def test_report_lists_changed_unchanged_and_missing(self):
+        ids = [user.pk for user in self.users]
+        missing = max(ids) + 100
+        response = self.post(ids + [missing, ids[0]])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {
+            'requested': 4, 'changed': ids[:2], 'unchanged': 1, 'missing': [missing],
+        })
+        self.assertEqual(set(Subscription.objects.values_list('status', flat=True)), {'expired'})
+
+    def test_expiring_matches_the_sweep(self):
+        user = self.users[0]
+        self.post([user.pk])
+        user.refresh_from_db()
+        self.assertEqual(user.role, 'free')
+        self.assertFalse(user.has_premium_access())
+
+    def test_chunks_are_updated_separately(self):
+        ids = [user.pk for user in self.users]
+        with mock.patch('api.accounts.apply_subscription_status') as apply:
+            report = accounts.bulk_set_subscription_status(ids, 'expired', chunk_size=1)
+        self.assertEqual(report['changed'], ids[:2])
+        self.assertEqual([c.args[0] for c in apply.call_args_list], [[ids[0]], [ids[1]], []])
+
+    def test_admin_only(self):
+        self.client.force_authenticate(self.users[0])
+        response = self.post([self.users[1].pk])
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Subscription.objects.get(user=self.users[1]).status, 'active')
+
+
+# ---------- LESSON CONTENT ----------
+class LessonContentTests(TestCase):
+    def setUp(self):
+        instructor = User.objects.create(username='instructor', role='staff')
+        self.student = User.objects.create(username='student')
+        self.course = make_course(instructor, access_type='premium')
+        self.lesson = Lesson.objects.create(
+            course=self.course, title='Intro', video_url='http://example.com/v', content='x' * 100, order=1
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_requires_enrollment(self):
+        response = self.client.get(f'/api/lessons/{self.lesson.pk}/content/')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['error'], 'Enroll in this course to view its lessons')
+
+    def test_enrolled_student_reads_pages(self):
+        enroll(self.student, self.course.pk)
+        response = self.client.get(f'/api/lessons/{self.lesson.pk}/content/?limit=60')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('access_type', response.data)
+        self.assertEqual(response.data['next_offset'], 60)
+
+
+# ---------- REVENUE ----------
+class RevenueCohortTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.old = User.objects.create(username='old')
+        User.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=100))
+        self.new = User.objects.create(username='new')
+
+    def pay(self, user, amount, status='success'):
+        return Payment.objects.create(user=user, amount=Decimal(amount), payment_method='stripe', status=status)
+
+    def test_signals_keep_cohort_rollup_in_step_with_ledger(self):
+        self.pay(self.old, '10.00')
+        pending = self.pay(self.new, '4.00', status='pending')
+        self.pay(self.new, '6.00')
+        pending.status = 'success'
+        pending.save()
+        self.pay(self.new, '99.00').delete()
+
+        incremental = cohort_report(self.today, self.today)
+        rollup_revenue_days(self.today, self.today)
+        self.assertEqual(cohort_report(self.today, self.today), incremental)
+
+        self.assertEqual(
+            [(row['amount'], row['payments']) for row in incremental],
+            [(Decimal('10.00'), 1), (Decimal('10.00'), 2)],
+        )
+        self.assertEqual(RevenueDailyStats.objects.filter(payments__gt=0).count(), 2)
+
+
+# ---------- FORUM STREAMS ----------
+@override_settings(FORUM_STREAM_BROKER='api.streams.InProcessBroker')
+class ForumStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='poster')
+        self.thread = ForumThread.objects.create(user=self.user, title='Thread', content='...')
+        self.other = ForumThread.objects.create(user=self.user, title='Other', content='...')
+        streams._hub = None
+        self.addCleanup(setattr, streams, '_hub', None)
+
+    async def next_frame(self, stream):
+        return await asyncio.wait_for(anext(stream), timeout=2)
+
+    async def reply(self, thread, text):
+        return await ForumReply.objects.acreate(thread=thread, user=self.user, content=text)
+
+    async def test_new_reply_fans_out_to_every_watcher_of_its_thread(self):
+        watchers = [streams.reply_events(self.thread.pk) for _ in range(3)]
+        elsewhere = streams.reply_events(self.other.pk)
+        for stream in watchers + [elsewhere]:
+            self.assertEqual(await self.next_frame(stream), ': connected\n\n')
+
+        reply = await self.reply(self.thread, 'hello')
+        for stream in watchers:
+            frame = await self.next_frame(stream)
+            self.assertTrue(frame.startswith(f'id: {reply.pk}\nevent: reply\n'))
+
+        # A reply elsewhere reaches the other thread's watcher only
+        other_reply = await self.reply(self.other, 'elsewhere')
+        self.assertTrue((await self.next_frame(elsewhere)).startswith(f'id: {other_reply.pk}\n'))
+        self.assertEqual(len(streams.get_hub().subscribers[self.thread.pk]), 3)
+
+        for stream in watchers + [elsewhere]:
+            await stream.aclose()
+        self.assertEqual(dict(streams.get_hub().subscribers), {})
+
+    async def test_last_event_id_replays_missed_replies_first(self):
+        first = await self.reply(self.thread, 'one')
+        missed = [await self.reply(self.thread, 'two'), await self.reply(self.thread, 'three')]
+
+        stream = streams.reply_events(self.thread.pk, last_id=first.pk)
+        for reply in missed:
+            self.assertTrue((await self.next_frame(stream)).startswith(f'id: {reply.pk}\n'))
+        self.assertEqual(await self.next_frame(stream), ': connected\n\n')
+
+        live = await self.reply(self.thread, 'four')
+        self.assertTrue((await self.next_frame(stream)).startswith(f'id: {live.pk}\n'))
+        await stream.aclose()
+
+    async def test_broker_failure_closes_streams(self):
+        class BrokenBroker:
+            async def listen(self):
+                raise RuntimeError('connection lost')
+                yield
+
+        streams._hub = streams.ReplyHub(BrokenBroker())
+        stream = streams.reply_events(self.thread.pk)
+        with self.assertLogs('api.streams', 'ERROR'):
+            self.assertEqual(await self.next_frame(stream), ': connected\n\n')
+            with self.assertRaises(StopAsyncIteration):
+                await self.next_frame(stream)
+
+    @override_settings(FORUM_STREAM_POLL_INTERVAL=0, FORUM_STREAM_RESCAN_WINDOW=60)
+    async def test_polling_broker_delivers_late_committed_lower_ids(self):
+        listener = streams.PollingBroker().listen()
+        polled = asyncio.ensure_future(anext(listener))
+        await asyncio.sleep(0.05)  # first poll has run and found nothing
+
+        base = (await ForumReply.objects.order_by('-id').values_list('id', flat=True).afirst() or 0) + 10
+        await ForumReply.objects.acreate(id=base + 5, thread=self.thread, user=self.user, content='fast')
+        self.assertEqual((await asyncio.wait_for(polled, 2))['id'], base + 5)
+        # A transaction that took an id earlier commits later
+        await ForumReply.objects.acreate(id=base, thread=self.thread, user=self.user, content='slow')
+        self.assertEqual((await asyncio.wait_for(anext(listener), 2))['id'], base)
+        await listener.aclose()
+
+    @override_settings(FORUM_STREAM_POLL_INTERVAL=0, FORUM_STREAM_RESCAN_WINDOW=0)
+    async def test_polling_broker_without_rescan_window(self):
+        listener = streams.PollingBroker().listen()
+        polled = asyncio.ensure_future(anext(listener))
+        await asyncio.sleep(0.05)  # a few empty polls have run
+        reply = await self.reply(self.thread, 'hello')
+        self.assertEqual((await asyncio.wait_for(polled, 2))['id'], reply.pk)
+        await listener.aclose()
+
+    def test_wsgi_requests_get_501(self):
+        response = self.client.get(f'/api/forum-threads/{self.thread.pk}/stream/')
+        self.assertEqual(response.status_code, 501)
+
+
+# ---------- PROFILE PICTURES ----------
+def png_bytes(color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (1, 1), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ProfilePictureNameTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create(username='pictured')
+
+    def expected(self, data, extension='.png'):
+        return f'profile_pics/{hashlib.sha256(data).hexdigest()[:32]}{extension}'
+
+    def test_programmatic_save_hashes_new_content(self):
+        first = png_bytes('red')
+        self.user.profile_picture.save('Avatar.PNG', ContentFile(first))
+        self.assertEqual(self.user.profile_picture.name, self.expected(first))
+
+        replacement = png_bytes('blue')
+        self.user.profile_picture.save('avatar.png', ContentFile(replacement))
+        self.assertEqual(self.user.profile_picture.name, self.expected(replacement))
+
+    def test_profile_upload_is_named_by_content(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = png_bytes()
+        response = client.put(
+            '/api/profile/', {'profile_picture': SimpleUploadedFile('me.png', data, content_type='image/png')}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_picture.name, self.expected(data))
+
+    def test_same_content_reuses_the_stored_file(self):
+        data = png_bytes()
+        self.user.profile_picture.save('a.png', ContentFile(data))
+        other = User.objects.create(username='twin')
+        other.profile_picture.save('b.png', ContentFile(data))
+        self.assertEqual(other.profile_picture.name, self.expected(data))
+        other.refresh_from_db()
+        self.assertEqual(other.profile_picture.name, self.expected(data))
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'profile_pics')), [os.path.basename(self.expected(data))])
+
+
+# ---------- MEDIA ----------
+class MediaServingTests(TestCase):
+    hashed = 'profile_pics/0123456789abcdef0123456789abcdef.png'
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        override = override_settings(MEDIA_ROOT=media, MEDIA_OFFLOAD=None)
+        override.enable()
+        self.addCleanup(override.disable)
+        for name in (self.hashed, 'docs/read me.txt'):
+            os.makedirs(os.path.join(media, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(media, name), 'wb') as f:
+                f.write(b'0123456789')
+
+    def get(self, path, **headers):
+        return self.client.get(f'/media/{path}', headers=headers)
+
+    def test_range_request_gets_206(self):
+        response = self.get(self.hashed, Range='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+    def test_unsatisfiable_range_gets_416(self):
+        response = self.get(self.hashed, Range='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_matching_etag_gets_304(self):
+        etag = self.get(self.hashed)['ETag']
+        response = self.get(self.hashed, If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_cache_control(self):
+        self.assertIn('immutable', self.get(self.hashed)['Cache-Control'])
+        with self.settings(MEDIA_CACHE_MAX_AGE=60):
+            self.assertEqual(self.get('docs/read me.txt')['Cache-Control'], 'public, max-age=60')
+
+    def test_x_accel_redirect_path_is_quoted(self):
+        with self.settings(MEDIA_OFFLOAD='x-accel-redirect', MEDIA_OFFLOAD_PREFIX='/protected/'):
+            response = self.get('docs/read me.txt')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/docs/read%20me.txt')
+        self.assertEqual(response.content, b'')
+
+    def test_x_sendfile_points_at_the_file(self):
+        with self.settings(MEDIA_OFFLOAD='x-sendfile'):
+            response = self.get(self.hashed)
+        self.assertEqual(response['X-Sendfile'], os.path.join(settings.MEDIA_ROOT, self.hashed))
+
+
+# ---------- RECOMMENDATIONS ----------
+@override_settings(RECOMMENDATION_RESCAN_WINDOW=0)
+class RecommendationChangeDetectionTests(TestCase):
+    def setUp(self):
+        instructor = User.objects.create(username='instructor', role='staff')
+        self.courses = [make_course(instructor, title=f'Course {i}') for i in range(3)]
+        self.learners = [User.objects.create(username=f'learner{i}') for i in range(2)]
+        a, b, c = self.courses
+        for course in (a, b):
+            enroll(self.learners[0], course.pk)
+        for course in (b, c):
+            enroll(self.learners[1], course.pk)
+        recommendations.recompute(full=True)
+
+    def recommended(self, course):
+        return list(
+            CourseRecommendation.objects.filter(course=course).order_by('rank').values_list('recommended_id', flat=True)
+        )
+
+    def test_progress_heartbeats_do_not_trigger_recompute(self):
+        UserCourseProgress.objects.create(user=self.learners[0], course=self.courses[0])
+        self.assertEqual(recommendations.recompute(), 0)
+
+    def test_new_enrollment_is_picked_up(self):
+        a, b, c = self.courses
+        enroll(self.learners[0], c.pk)
+        self.assertGreater(recommendations.recompute(), 0)
+        self.assertIn(c.pk, self.recommended(a))
+
+    def test_removed_enrollment_is_picked_up(self):
+        a, b, c = self.courses
+        self.assertEqual(self.recommended(a), [b.pk])
+        Enrollment.objects.filter(user=self.learners[0], course=b).delete()
+
+        self.assertGreater(recommendations.recompute(), 0)
+        self.assertEqual(self.recommended(a), [])
+        self.assertEqual(self.recommended(b), [c.pk])
+        self.assertFalse(EnrollmentRemoval.objects.exists())
+        self.assertEqual(recommendations.recompute(), 0)
+
+    @override_settings(RECOMMENDATION_RESCAN_WINDOW=60)
+    def test_late_committed_enrollment_is_picked_up(self):
+        a, b, c = self.courses
+        enroll(self.learners[0], c.pk)
+        # The last run read the id mark after this row got its id, but before it committed
+        late = Enrollment.objects.get(user=self.learners[0], course=c)
+        run = RecommendationRun.objects.get()
+        run.enrollment_mark = late.pk
+        run.save()
+        Enrollment.objects.filter(pk=late.pk).update(enrolled_at=run.started_at - timedelta(seconds=30))
+
+        self.assertGreater(recommendations.recompute(), 0)
+        self.assertIn(c.pk, self.recommended(a))
+
+    def test_removal_committed_during_a_run_is_kept_for_the_next(self):
+        a, b, c = self.courses
+        Enrollment.objects.filter(user=self.learners[1], course=c).delete()
+        read = EnrollmentRemoval.objects.get()
+        load_pairs = recommendations._load_pairs
+
+        def load_pairs_then_unenroll():
+            pairs = load_pairs()
+            Enrollment.objects.filter(user=self.learners[0], course=b).delete()
+            # It took a lower id than the removal the run read, but committed after
+            EnrollmentRemoval.objects.exclude(pk=read.pk).update(id=read.pk - 1)
+            return pairs
+
+        with mock.patch.object(recommendations, '_load_pairs', load_pairs_then_unenroll):
+            recommendations.recompute()
+        self.assertEqual(list(EnrollmentRemoval.objects.values_list('id', flat=True)), [read.pk - 1])
+
+        self.assertGreater(recommendations.recompute(), 0)
+        self.assertEqual(self.recommended(a), [])
+        self.assertFalse(EnrollmentRemoval.objects.exists())
+
+
+# ---------- GITHUB METADATA ----------
+def repo_data(stars):
+    return {'description': f'{stars} stars', 'stars': stars, 'language': 'Python', 'pushed_at': None}
+
+
+class CountingClient(github.FakeGitHubClient):
+    """FakeGitHubClient that records how many fetches were in flight at once."""
+
+    def __init__(self, repos=None, delay=0.02):
+        super().__init__(repos)
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def fetch(self, repo):
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            return super().fetch(repo)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class GitHubMetadataTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create(username='owner')
+
+    def project(self, repo):
+        return AIProject.objects.create(
+            title=repo, description='...', user=self.owner, github_repo_url=f'https://github.com/{repo}'
+        )
+
+    def test_list_endpoint_never_calls_github(self):
+        project = self.project('octo/one')
+        github.refresh_stale(client=github.FakeGitHubClient({'octo/one': repo_data(5)}))
+        self.project('octo/unfetched')
+
+        with mock.patch.object(github, 'urlopen', side_effect=AssertionError('outbound call')) as urlopen:
+            response = APIClient().get('/api/ai-projects/')
+
+        self.assertEqual(response.status_code, 200)
+        urlopen.assert_not_called()
+        by_id = {row['id']: row for row in response.data}
+        self.assertEqual(by_id[project.pk]['github']['stars'], 5)
+
+    def test_only_stale_rows_are_refreshed(self):
+        fresh, stale = self.project('octo/fresh'), self.project('octo/stale')
+        client = CountingClient({'octo/fresh': repo_data(1), 'octo/stale': repo_data(2)}, delay=0)
+        github.refresh_stale(client=client)
+        self.assertEqual(client.calls, 2)
+
+        GitHubRepoMetadata.objects.filter(project=stale).update(expires_at=timezone.now() - timedelta(seconds=1))
+        client.repos['octo/stale'] = repo_data(20)
+        self.assertEqual(github.refresh_stale(client=client), (1, 0))
+        self.assertEqual(client.calls, 3)
+        self.assertEqual(GitHubRepoMetadata.objects.get(project=stale).stars, 20)
+        self.assertEqual(GitHubRepoMetadata.objects.get(project=fresh).stars, 1)
+
+    def test_fetches_are_bounded_by_concurrency(self):
+        repos = {f'octo/repo{i}': repo_data(i) for i in range(12)}
+        for repo in repos:
+            self.project(repo)
+        client = CountingClient(repos)
+
+        self.assertEqual(github.refresh_stale(concurrency=3, client=client), (12, 0))
+        self.assertEqual(client.peak, 3)
+
+    def test_failed_fetch_keeps_previous_metadata(self):
+        project = self.project('octo/one')
+        github.refresh_stale(client=github.FakeGitHubClient({'octo/one': repo_data(5)}))
+
+        # Repo moves to one GitHub can't serve: old values stay, labelled with the old repo
+        project.github_repo_url = 'https://github.com/octo/gone'
+        project.save()
+        self.assertEqual(github.refresh_stale(client=github.FakeGitHubClient()), (0, 1))
+
+        row = GitHubRepoMetadata.objects.get(project=project)
+        self.assertEqual((row.repo, row.stars), ('octo/one', 5))
+        self.assertIn('404', row.error)
+        self.assertGreater(row.expires_at, timezone.now())
@@ -5,11 +5,14 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import (
     RegisterView, CustomTokenObtainPairView, user_data,
-    enroll_course, is_enrolled, enrolled_users,
-    mark_lesson_complete, my_courses, course_progress,
+    enroll_course, is_enrolled, enrolled_users, course_recommendations,
+    mark_lesson_complete, my_courses, course_progress, lesson_activity,
+    lesson_content,
+    analytics_overview, course_analytics, course_funnel,
+    revenue_report, revenue_cohorts,
     UserViewSet, CourseViewSet, LessonViewSet,
-    ForumThreadViewSet, ForumReplyViewSet,
-    BlogPostViewSet, AIProjectViewSet, CommentViewSet,
+    ForumThreadViewSet, ForumReplyViewSet, forum_thread_stream,
+    BlogPostViewSet, BlogTagViewSet, AIProjectViewSet, CommentViewSet,
     EnrollCourseView, UserProfileUpdateView
 )
 
@@ -20,6 +23,7 @@ router.register(r'lessons', LessonViewSet)
 router.register(r'forum-threads', ForumThreadViewSet)
 router.register(r'forum-replies', ForumReplyViewSet)
 router.register(r'blog-posts', BlogPostViewSet)
+router.register(r'blog-tags', BlogTagViewSet)
 router.register(r'ai-projects', AIProjectViewSet)
 router.register(r'comments', CommentViewSet)
 
@@ -42,8 +46,23 @@ urlpatterns = [
     path('courses/<int:pk>/enrolled/', is_enrolled),
     path('courses/<int:pk>/enrolled-users/', enrolled_users),
     path('my-courses/', my_courses),
+    path('courses/<int:pk>/recommendations/', course_recommendations),
+
+    # 💬 Forum live replies (server-sent events, ASGI)
+    path('forum-threads/<int:pk>/stream/', forum_thread_stream),
 
     # ✅ Progress
     path('courses/<int:course_id>/lessons/<int:lesson_id>/complete/', mark_lesson_complete),
     path('courses/<int:course_id>/progress/', course_progress),
+    path('activity/', lesson_activity),
+
+    # 📖 Lesson content
+    path('lessons/<int:pk>/content/', lesson_content),
+
+    # 📊 Analytics (admin only)
+    path('analytics/overview/', analytics_overview),
+    path('analytics/courses/<int:pk>/', course_analytics),
+    path('analytics/courses/<int:pk>/funnel/', course_funnel),
+    path('analytics/revenue/', revenue_report),
+    path('analytics/revenue/cohorts/', revenue_cohorts),
 ]
@@ -1,24 +1,35 @@
 from rest_framework.views import APIView
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework import status, viewsets, permissions, pagination, generics
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.generics import CreateAPIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.gzip import gzip_page
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 
 from .models import (
     User, Course, Lesson, ForumThread, ForumReply,
-    BlogPost, AIProject, Comment, Enrollment, UserCourseProgress
+    BlogPost, BlogTag, AIProject, Comment, Enrollment, UserCourseProgress,
+    CourseRecommendation
 )
 from .serializers import (
     UserSerializer, UserUpdateSerializer, RegisterSerializer,
     CourseSerializer, LessonSerializer, ForumThreadSerializer,
     ForumReplySerializer, BlogPostSerializer, AIProjectSerializer,
-    CommentSerializer, EnrollmentSerializer, UserCourseProgressSerializer
+    CommentSerializer, EnrollmentSerializer, UserCourseProgressSerializer,
+    LessonEventBatchSerializer, BlogTagSerializer,
+    BulkUserRoleSerializer, BulkSubscriptionStatusSerializer
 )
+from . import analytics, activity, blog, content, enrollment, accounts, revenue, streams
+from .idempotency import idempotent
 
 
 # Pagination for scalability
@@ -43,14 +54,14 @@ def user_data(request):
 # Enrollment & Progress
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def enroll_course(request, pk):
     try:
-        course = Course.objects.get(pk=pk)
-    except Course.DoesNotExist:
+        created = enrollment.enroll(request.user, pk)
+    except enrollment.CourseNotFound:
         return Response({'error': 'Course not found'}, status=404)
 
-    Enrollment.objects.get_or_create(user=request.user, course=course)
-    return Response({'message': 'Enrolled successfully'}, status=200)
+    return Response({'message': 'Enrolled successfully', 'created': created}, status=200)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -87,6 +98,25 @@ def enrolled_users(request, pk):
     return Response(data)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def course_recommendations(request, pk):
+    # Precomputed by `manage.py recompute_recommendations`; one query.
+    recommendations = (
+        CourseRecommendation.objects
+        .filter(course_id=pk)
+        .select_related('recommended__instructor')
+        .order_by('rank')
+    )
+    if request.user.is_authenticated:
+        recommendations = recommendations.exclude(recommended__enrollments__user=request.user)
+
+    return Response([
+        {**CourseSerializer(r.recommended).data, 'score': round(r.score, 4)}
+        for r in recommendations
+    ])
+
+
 # Course Progress & Lesson Completion
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -108,14 +138,7 @@ def mark_lesson_complete(request, course_id, lesson_id):
     except (Course.DoesNotExist, Lesson.DoesNotExist):
         return Response({'error': 'Course or lesson not found'}, status=404)
 
-    progress, created = UserCourseProgress.objects.get_or_create(user=user, course=course)
-    progress.completed_lessons.add(lesson)
-
-    total_lessons = course.lessons.count()
-    completed = progress.completed_lessons.count()
-    progress.progress_percentage = round((completed / total_lessons) * 100, 2)
-    progress.completed = (progress.progress_percentage == 100.0)
-    progress.save()
+    progress = activity.complete_lesson(user, lesson)
 
     return Response({
         'message': 'Lesson marked complete',
@@ -123,12 +146,150 @@ def mark_lesson_complete(request, course_id, lesson_id):
     })
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def lesson_activity(request):
+    serializer = LessonEventBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    stored = activity.ingest_events(request.user, serializer.validated_data['events'])
+    return Response({'stored': stored}, status=202)
+
+
+# Lesson Content (paged, gzip-compressed when the client accepts it)
+@gzip_page
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def lesson_content(request, pk):
+    try:
+        limit = int(request.query_params.get('limit', content.CONTENT_PAGE_SIZE))
+        offset = int(request.query_params.get('offset', 0))
+        if 'section' in request.query_params:
+            offset = int(request.query_params['section']) * limit
+    except ValueError:
+        return Response({'error': 'offset, limit and section must be integers'}, status=400)
+
+    page = content.lesson_content_page(pk, offset=offset, limit=limit)
+    if page is None:
+        return Response({'error': 'Lesson not found'}, status=404)
+    if not content.can_view_lessons(request.user, page['course']):
+        return Response({'error': 'Enroll in this course to view its lessons'}, status=403)
+
+    return Response(page)
+
+
+# Analytics Reports (served from the daily rollup tables)
+def _report_date(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None  # well-formed but impossible, e.g. 2024-02-30
+    if parsed is None:
+        raise ValidationError({'error': f'{name} must be a valid YYYY-MM-DD date'})
+    return parsed
+
+def _report_range(request):
+    end = _report_date(request, 'end') or timezone.localdate()
+    start = _report_date(request, 'start') or end - timedelta(days=29)
+    if start > end:
+        raise ValidationError({'error': 'start must not be after end'})
+    return start, end
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def analytics_overview(request):
+    if request.user.role != 'admin':
+        return Response({'error': 'Unauthorized'}, status=403)
+
+    start, end = _report_range(request)
+    return Response({
+        'start': start,
+        'end': end,
+        'courses': analytics.overview_report(start, end),
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def course_analytics(request, pk):
+    if request.user.role != 'admin':
+        return Response({'error': 'Unauthorized'}, status=403)
+
+    try:
+        course = Course.objects.get(pk=pk)
+    except Course.DoesNotExist:
+        return Response({'error': 'Course not found'}, status=404)
+
+    start, end = _report_range(request)
+    return Response(analytics.course_report(course, start, end))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def course_funnel(request, pk):
+    if request.user.role != 'admin':
+        return Response({'error': 'Unauthorized'}, status=403)
+
+    try:
+        course = Course.objects.get(pk=pk)
+    except Course.DoesNotExist:
+        return Response({'error': 'Course not found'}, status=404)
+
+    return Response({'course': course.id, 'lessons': analytics.course_funnel(course)})
+
+
+# Revenue Reports (admin only)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def revenue_report(request):
+    if request.user.role != 'admin':
+        return Response({'error': 'Unauthorized'}, status=403)
+
+    start, end = _report_range(request)
+    return Response(revenue.revenue_report(
+        start, end,
+        method=request.query_params.get('method'),
+        group=request.query_params.get('group', 'day'),
+    ))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def revenue_cohorts(request):
+    if request.user.role != 'admin':
+        return Response({'error': 'Unauthorized'}, status=403)
+
+    start, end = _report_range(request)
+    return Response({
+        'start': start,
+        'end': end,
+        'cohorts': revenue.cohort_report(start, end, method=request.query_params.get('method')),
+    })
+
+
 # ViewSets with Pagination
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @action(detail=False, methods=['post'], url_path='bulk-role')
+    def bulk_role(self, request):
+        if request.user.role != 'admin':
+            return Response({'error': 'Unauthorized'}, status=403)
+
+        serializer = BulkUserRoleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(accounts.bulk_set_role(**serializer.validated_data))
+
+    @action(detail=False, methods=['post'], url_path='bulk-subscription-status')
+    def bulk_subscription_status(self, request):
+        if request.user.role != 'admin':
+            return Response({'error': 'Unauthorized'}, status=403)
+
+        serializer = BulkSubscriptionStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(accounts.bulk_set_subscription_status(**serializer.validated_data))
+
 class CourseViewSet(viewsets.ModelViewSet):
     queryset = Course.objects.all().order_by('-created_at')
     serializer_class = CourseSerializer
@@ -140,11 +301,9 @@ class CourseViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(course)
         data = serializer.data
 
-        user = request.user
-        is_enrolled = Enrollment.objects.filter(user=user, course=course).exists()
-
-        if is_enrolled or user.role in ['admin', 'staff']:
-            data['lessons'] = LessonSerializer(course.lessons.all(), many=True).data
+        # Outline only; lesson bodies are paged from /api/lessons/<pk>/content/
+        if content.can_view_lessons(request.user, course.id):
+            data['lessons'] = content.lesson_outline(course, request.user)
         else:
             data['lessons'] = []
 
@@ -178,6 +337,25 @@ class ForumThreadViewSet(viewsets.ModelViewSet):
     serializer_class = ForumThreadSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+# Forum reply stream (plain async Django view: SSE needs ASGI, DRF views are sync)
+async def forum_thread_stream(request, pk):
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI each open stream would hold a worker for its whole life
+        return JsonResponse({'error': 'Reply streams are only served by the ASGI application'}, status=501)
+    if not await ForumThread.objects.filter(pk=pk).aexists():
+        return JsonResponse({'error': 'Thread not found'}, status=404)
+
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        return JsonResponse({'error': 'Last-Event-ID must be a reply id'}, status=400)
+
+    response = StreamingHttpResponse(streams.reply_events(pk, last_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 class ForumReplyViewSet(viewsets.ModelViewSet):
     queryset = ForumReply.objects.all()
     serializer_class = ForumReplySerializer
@@ -188,8 +366,24 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     serializer_class = BlogPostSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        # ?tag=a&tag=b or ?tag=a,b; ?match=any switches from AND to OR
+        tags = blog.clean_tags(
+            t for value in self.request.query_params.getlist('tag') for t in value.split(',')
+        )
+        if not tags:
+            return self.queryset
+        if self.request.query_params.get('match') == 'any':
+            return self.queryset.filter(tags__has_any_keys=tags)
+        return self.queryset.filter(tags__contains=tags)
+
+class BlogTagViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = BlogTag.objects.filter(post_count__gt=0).order_by('-post_count', 'name')
+    serializer_class = BlogTagSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
 class AIProjectViewSet(viewsets.ModelViewSet):
-    queryset = AIProject.objects.all()
+    queryset = AIProject.objects.select_related('github')
     serializer_class = AIProjectSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -238,5 +432,17 @@ class EnrollCourseView(CreateAPIView):
     serializer_class = EnrollmentSerializer
     permission_classes = [IsAuthenticated]
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        try:
+            course_id = int(request.data.get('course'))
+        except (TypeError, ValueError):
+            return Response({'course': ['A valid course id is required.']}, status=400)
+
+        try:
+            created = enrollment.enroll(request.user, course_id)
+        except enrollment.CourseNotFound:
+            return Response({'error': 'Course not found'}, status=404)
+
+        instance = Enrollment.objects.get(user=request.user, course_id=course_id)
+        return Response(self.get_serializer(instance).data, status=201 if created else 200)